@@ -0,0 +1,91 @@
+# benchmark_export.py
+"""
+Compara el tiempo y el tamaño del video de salida para distintos modos de
+exportación (resolución completa, escala reducida, stride, sólo frames cercanos
+a detecciones y exportación diferida con archivo de anotaciones).
+Usa el video de la carpeta de entrada configurada en config.py.
+"""
+import argparse
+import os
+import sys
+import time
+
+from main import find_video_file
+from programa.tracker import BallTracker
+from programa.export import render_annotated_video
+from programa.config import (VIDEO_INPUT_FOLDER, VIDEO_OUTPUT_FOLDER,
+    VALID_VIDEO_EXTENSIONS, OUTPUT_VIDEO_CODEC, OUTPUT_VIDEO_EXTENSION)
+
+# (nombre, escala, stride, margen de detección, diferido)
+EXPORT_MODES = [
+    ('sin_video',        None, None, None, False),
+    ('completo',         1.0,  1,    None, False),
+    ('escala_0.5',       0.5,  1,    None, False),
+    ('stride_3',         1.0,  3,    None, False),
+    ('margen_15',        1.0,  1,    15,   False),
+    ('diferido',         1.0,  1,    None, True),
+    ('diferido_0.5_m15', 0.5,  1,    15,   True),
+]
+
+
+def run_mode(video_path, output_folder, name, scale, stride, margin, deferred, codec):
+    """
+    Ejecuta el tracking con un modo de exportación.
+
+    Returns:
+    dict: Tiempo de tracking, tiempo de la pasada diferida y tamaño del video.
+    """
+    output_path = os.path.join(output_folder, f"{name}{OUTPUT_VIDEO_EXTENSION}") if scale else None
+    annotations_path = os.path.join(output_folder, f"{name}_annotations.csv") if deferred else None
+
+    tracker = BallTracker()
+    track_start = time.perf_counter()
+    tracker.track(video_path,
+                  output_video_path=None if deferred else output_path,
+                  show_video=False,
+                  video_codec=codec, export_scale=scale, export_stride=stride,
+                  export_margin=margin, annotations_path=annotations_path)
+    track_time = time.perf_counter() - track_start
+
+    render_time = 0.0
+    if deferred:
+        render_start = time.perf_counter()
+        render_annotated_video(video_path, annotations_path, output_path, codec=codec,
+                               scale=scale, stride=stride, detection_margin=margin)
+        render_time = time.perf_counter() - render_start
+
+    size = os.path.getsize(output_path) if output_path and os.path.exists(output_path) else 0
+    return {'track': track_time, 'render': render_time, 'size': size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de los modos de exportación de video.')
+    parser.add_argument('--codec', type=str, default=OUTPUT_VIDEO_CODEC,
+                        help=f'FourCC del codec (por defecto: {OUTPUT_VIDEO_CODEC}).')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Repeticiones por modo; se reporta el mejor tiempo (por defecto: 1).')
+    args = parser.parse_args()
+
+    video_path = find_video_file(VIDEO_INPUT_FOLDER, VALID_VIDEO_EXTENSIONS)
+    if video_path is None: sys.exit(1)
+
+    output_folder = os.path.join(VIDEO_OUTPUT_FOLDER, 'benchmark_export')
+    os.makedirs(output_folder, exist_ok=True)
+
+    results = []
+    for name, scale, stride, margin, deferred in EXPORT_MODES:
+        print(f"\n--- Modo: {name} ---")
+        runs = [run_mode(video_path, output_folder, name, scale, stride, margin, deferred, args.codec)
+                for _ in range(max(1, args.repeat))]
+        best = min(runs, key=lambda r: r['track'] + r['render'])
+        results.append((name, best))
+
+    print("\n--- Resultados ---")
+    print(f"{'Modo':<18} {'Tracking (s)':>13} {'Diferido (s)':>13} {'Total (s)':>10} {'Tamaño (MB)':>12}")
+    for name, r in results:
+        print(f"{name:<18} {r['track']:>13.2f} {r['render']:>13.2f} "
+              f"{r['track'] + r['render']:>10.2f} {r['size'] / 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,11 +11,17 @@ import sys # Para salir del script con sys.exit()
 
 # Importar componentes del proyecto y configuración
 from programa.tracker import BallTracker
-from programa.analysis import calculate_kinematics
+from programa.analysis import DERIVATIVE_ESTIMATORS
 from programa.plotting import plot_kinematics
+from programa.streaming import StreamingResultsWriter, describe_source, read_csv_downsampled
+from programa.export import render_annotated_video
 from programa.config import (VIDEO_INPUT_FOLDER, VIDEO_OUTPUT_FOLDER,
     VALID_VIDEO_EXTENSIONS, DEFAULT_OUTPUT_FILENAME_SUFFIX,
-    OUTPUT_VIDEO_EXTENSION) # Nueva importación
+    OUTPUT_VIDEO_EXTENSION, STREAM_CHUNK_SIZE, STREAM_FLUSH_INTERVAL_SECONDS,
+    CHECKPOINT_FILENAME_SUFFIX,
+    PREVIEW_REFRESH_HZ, OUTPUT_VIDEO_CODEC, EXPORT_SCALE, EXPORT_FRAME_STRIDE,
+    EXPORT_DETECTION_MARGIN, ANNOTATIONS_FILENAME_SUFFIX,
+    DETECTOR_BACKEND, DETECTOR_BACKENDS) # Nueva importación
 
 def find_video_file(input_folder, valid_extensions):
     """
@@ -63,6 +69,101 @@ def find_video_file(input_folder, valid_extensions):
         return full_path
 
 
+def export_options(args):
+    """Opciones de exportación de video (argumentos de BallTracker.track)."""
+    return {'video_codec': args.codec, 'export_scale': args.export_scale,
+            'export_stride': args.export_stride, 'export_margin': args.export_margin}
+
+
+def render_deferred_video(args, video_full_path, annotations_path, output_video_full_path):
+    """Segunda pasada de la exportación diferida: codifica el video a partir del sidecar."""
+    if not annotations_path or not output_video_full_path: return
+    print("\n--- Exportación diferida del video ---")
+    render_start = time.time()
+    frames_written = render_annotated_video(video_full_path, annotations_path, output_video_full_path,
+                                            codec=args.codec, scale=args.export_scale,
+                                            stride=args.export_stride,
+                                            detection_margin=args.export_margin)
+    if frames_written is not None:
+        print(f"Exportación diferida completada en {time.time() - render_start:.2f} segundos.")
+
+
+def run_streaming(args, video_full_path, video_filename_base,
+                  output_csv_full_path, output_video_full_path, annotations_path, start_time):
+    """
+    Ejecuta el tracking en modo streaming: los resultados se escriben al CSV por
+    bloques junto con un checkpoint, sin acumular todo el video en memoria.
+    """
+    checkpoint_path = os.path.join(VIDEO_OUTPUT_FOLDER,
+                                   video_filename_base + CHECKPOINT_FILENAME_SUFFIX)
+    try:
+        writer = StreamingResultsWriter(output_csv_full_path, checkpoint_path, resume=args.resume,
+                                        source=describe_source(video_full_path, args.detector))
+    except ValueError as e:
+        print(f"Error: No se puede reanudar: {e}")
+        print("Para empezar de nuevo, ejecutar sin --resume (se reemplazan los resultados previos).")
+        sys.exit(1)
+
+    if writer.next_frame > 0 and output_video_full_path:
+        # El VideoWriter no puede continuar un archivo existente sin reescribirlo
+        print("Advertencia: Al reanudar no se guarda el video con tracking.")
+        output_video_full_path = None
+        annotations_path = None
+
+    print(f"\n--- Iniciando Tracking (streaming, bloques de {args.chunk_size} puntos) ---")
+    tracker = BallTracker(detector_backend=args.detector)
+    tracking_data = tracker.track(video_full_path,
+                                  output_video_path=None if annotations_path else output_video_full_path,
+                                  show_video=not args.hide_video,
+                                  preview_hz=args.preview_hz,
+                                  start_frame=writer.next_frame,
+                                  chunk_size=args.chunk_size,
+                                  flush_interval=args.flush_interval,
+                                  on_chunk=writer.write_chunk,
+                                  annotations_path=annotations_path,
+                                  **export_options(args))
+
+    if tracking_data is None:
+        print("Error fatal durante la inicialización del tracker (¿problema con el archivo?).")
+        sys.exit(1)
+
+    if tracker.stopped_early:
+        # El checkpoint se conserva para poder continuar con --resume
+        print(f"Procesamiento interrumpido en el frame {writer.next_frame}: {writer.rows_written} filas "
+              f"guardadas. Ejecutar con --resume para continuar.")
+    else:
+        writer.finalize()
+
+    if writer.rows_written == 0:
+        print("No se detectaron puntos de la pelota. No se generarán gráficos.")
+        render_deferred_video(args, video_full_path, annotations_path, output_video_full_path)
+        end_time = time.time()
+        print(f"\nProceso terminado en {end_time - start_time:.2f} segundos (sin detección).")
+        return
+
+    # --- Generar Gráficos ---
+    # Se lee el CSV ya guardado por bloques, sólo las columnas necesarias y, en
+    # videos largos, 1 de cada N filas (memoria acotada por STREAM_PLOT_MAX_POINTS)
+    if args.no_plots:
+        print("\nGráficos omitidos (--no_plots).")
+    else:
+        print("\n--- Generando Gráficos ---")
+        try:
+            plot_df, step = read_csv_downsampled(output_csv_full_path,
+                                                 ['time', 'x', 'y', 'vx', 'vy', 'ax', 'ay'],
+                                                 writer.rows_written)
+            if step > 1:
+                print(f"Se grafica 1 de cada {step} puntos ({len(plot_df)} de {writer.rows_written}).")
+            plot_kinematics(plot_df, output_folder=VIDEO_OUTPUT_FOLDER, base_filename=video_filename_base)
+        except Exception as e:
+            print(f"Error al generar gráficos: {e}")
+
+    render_deferred_video(args, video_full_path, annotations_path, output_video_full_path)
+
+    end_time = time.time()
+    print(f"\nProceso completado exitosamente en {end_time - start_time:.2f} segundos.")
+
+
 def main():
     """Función principal que orquesta el proceso."""
     # Argument Parser
@@ -81,9 +182,67 @@ def main():
                              f'"{VIDEO_OUTPUT_FOLDER}".')
     parser.add_argument('--output_suffix', type=str, default=DEFAULT_OUTPUT_FILENAME_SUFFIX,
                         help=f'Sufijo para el archivo CSV de salida (por defecto: {DEFAULT_OUTPUT_FILENAME_SUFFIX}).')
+    parser.add_argument('--detector', type=str, default=DETECTOR_BACKEND, choices=DETECTOR_BACKENDS,
+                        help=f'Detector de la pelota (por defecto: {DETECTOR_BACKEND}).')
+    parser.add_argument('--estimator', type=str, default='backward', choices=list(DERIVATIVE_ESTIMATORS),
+                        help='Estimador de velocidad y aceleración (por defecto: backward).')
+    parser.add_argument('--codec', type=str, default=OUTPUT_VIDEO_CODEC,
+                        help=f'FourCC del codec del video de salida (por defecto: {OUTPUT_VIDEO_CODEC}).')
+    parser.add_argument('--export_scale', type=float, default=EXPORT_SCALE,
+                        help=f'Factor de escala de la resolución del video de salida (por defecto: {EXPORT_SCALE}).')
+    parser.add_argument('--export_stride', type=int, default=EXPORT_FRAME_STRIDE,
+                        help=f'Escribir 1 de cada N frames en el video de salida (por defecto: {EXPORT_FRAME_STRIDE}).')
+    parser.add_argument('--export_margin', type=int, default=EXPORT_DETECTION_MARGIN,
+                        help='Escribir sólo los frames a N frames o menos de una detección '
+                             '(por defecto: todo el video).')
+    parser.add_argument('--deferred_export', action='store_true',
+                        help='Guardar las detecciones en un archivo de anotaciones y codificar '
+                             'el video en una pasada posterior, sin frenar el tracking.')
+    parser.add_argument('--async_preview', action='store_true',
+                        help='Actualizar la ventana en un hilo aparte a baja frecuencia '
+                             '(el tracking no espera al display).')
+    parser.add_argument('--preview_hz', type=float, default=PREVIEW_REFRESH_HZ,
+                        help=f'Frecuencia de refresco de la vista previa asíncrona (por defecto: {PREVIEW_REFRESH_HZ}).')
+    parser.add_argument('--stream', action='store_true',
+                        help='Modo streaming para videos largos: guarda el CSV por bloques '
+                             'y un checkpoint, manteniendo el uso de memoria constante.')
+    parser.add_argument('--no_plots', action='store_true',
+                        help='No generar los gráficos de posición, velocidad y aceleración.')
+    parser.add_argument('--chunk_size', type=int, default=STREAM_CHUNK_SIZE,
+                        help=f'Puntos por bloque en modo streaming (por defecto: {STREAM_CHUNK_SIZE}).')
+    parser.add_argument('--flush_interval', type=float, default=STREAM_FLUSH_INTERVAL_SECONDS,
+                        help='Segundos máximos entre checkpoints en modo streaming, aunque no haya '
+                             f'detecciones (por defecto: {STREAM_FLUSH_INTERVAL_SECONDS}).')
+    parser.add_argument('--resume', action='store_true',
+                        help='En modo streaming, reanudar desde el último checkpoint guardado.')
 
     args = parser.parse_args()
 
+    # Frecuencia de la vista previa asíncrona (None = ventana síncrona, cuadro a cuadro)
+    args.preview_hz = args.preview_hz if args.async_preview else None
+    if args.async_preview and args.preview_hz <= 0:
+        print("Error: --preview_hz debe ser mayor que cero.")
+        sys.exit(1)
+
+    if args.export_scale <= 0 or args.export_stride <= 0 or (args.export_margin is not None and args.export_margin < 0):
+        print("Error: --export_scale y --export_stride deben ser mayores que cero y --export_margin no negativo.")
+        sys.exit(1)
+
+    if args.resume: args.stream = True # Reanudar sólo tiene sentido en modo streaming
+    if args.stream and args.no_save_csv:
+        print("Error: El modo streaming necesita guardar el CSV (no usar --no_save_csv).")
+        sys.exit(1)
+    if args.stream and args.estimator != 'backward':
+        # Las diferencias centradas necesitan el punto siguiente, que puede estar en otro bloque
+        print("Error: El modo streaming sólo admite el estimador 'backward'.")
+        sys.exit(1)
+    if args.stream and args.chunk_size <= 0:
+        print("Error: --chunk_size debe ser mayor que cero.")
+        sys.exit(1)
+    if args.stream and args.flush_interval <= 0:
+        print("Error: --flush_interval debe ser mayor que cero.")
+        sys.exit(1)
+
     start_time = time.time()
 
     # --- Encontrar el archivo de video ---
@@ -97,6 +256,7 @@ def main():
     video_filename_base = os.path.splitext(os.path.basename(video_full_path))[0]
     output_csv_full_path = None
     output_video_full_path = None # Inicializar
+    annotations_path = None # Sólo en exportación diferida
 
     # Crear carpeta de salida si es necesario (para CSV o Video)
     should_create_output_folder = not args.no_save_csv or not args.no_save_video
@@ -115,6 +275,9 @@ def main():
                 # Usar extensión definida en config.py
                 output_video_filename = video_filename_base + '_tracked' + OUTPUT_VIDEO_EXTENSION
                 output_video_full_path = os.path.join(VIDEO_OUTPUT_FOLDER, output_video_filename)
+                if args.deferred_export:
+                    annotations_path = os.path.join(VIDEO_OUTPUT_FOLDER,
+                                                    video_filename_base + ANNOTATIONS_FILENAME_SUFFIX)
 
         except OSError as e:
             print(f"Error al crear la carpeta de salida '{VIDEO_OUTPUT_FOLDER}': {e}")
@@ -123,13 +286,26 @@ def main():
             args.no_save_video = True
 
 
+    # --- Modo Streaming ---
+    if args.stream:
+        if output_csv_full_path is None:
+            print("Error: No se pudo determinar la ruta del CSV para el modo streaming.")
+            sys.exit(1)
+        run_streaming(args, video_full_path, video_filename_base,
+                      output_csv_full_path, output_video_full_path, annotations_path, start_time)
+        return
+
     # --- Iniciar Tracking ---
     print("\n--- Iniciando Tracking ---")
-    tracker = BallTracker()
+    tracker = BallTracker(detector_backend=args.detector)
     # Pasar la ruta del video de salida al tracker
+    # En exportación diferida no se codifica durante el tracking, sólo se guardan anotaciones
     tracking_data = tracker.track(video_full_path,
-                                  output_video_path=output_video_full_path, # Pasar la ruta
-                                  show_video=not args.hide_video)
+                                  output_video_path=None if annotations_path else output_video_full_path, # Pasar la ruta
+                                  show_video=not args.hide_video,
+                                  preview_hz=args.preview_hz,
+                                  annotations_path=annotations_path,
+                                  **export_options(args))
 
     if tracking_data is None:
         print("Error fatal durante la inicialización del tracker (¿problema con el archivo?).")
@@ -137,6 +313,7 @@ def main():
 
     if not tracking_data:
         print("No se detectaron puntos de la pelota. No se realizará análisis ni guardado.")
+        render_deferred_video(args, video_full_path, annotations_path, output_video_full_path)
         end_time = time.time()
         print(f"\nProceso terminado en {end_time - start_time:.2f} segundos (sin detección).")
         return # Salir si no hay datos
@@ -146,7 +323,7 @@ def main():
     # Pasar los FPS reales obtenidos del video para cálculos más precisos
     # (Asumiendo que analysis.py puede usarlo, si no, se usa el 'time' ya calculado)
     # kinematics_df = calculate_kinematics(tracking_data, fps=tracker.fps) # Modificación opcional en analysis.py
-    kinematics_df = calculate_kinematics(tracking_data) # Usando la versión actual de analysis.py
+    kinematics_df = DERIVATIVE_ESTIMATORS[args.estimator](tracking_data) # 'backward' = calculate_kinematics
 
     # --- Mostrar DataFrame (opcional) ---
     print("\nDataFrame con datos cinemáticos (primeras 5 filas):")
@@ -165,7 +342,9 @@ def main():
 
     # --- Generar Gráficos ---
     # Verificar si hay datos suficientes para graficar (al menos velocidad)
-    if 'vx' in kinematics_df.columns and not kinematics_df['vx'].isnull().all():
+    if args.no_plots:
+        print("\nGráficos omitidos (--no_plots).")
+    elif 'vx' in kinematics_df.columns and not kinematics_df['vx'].isnull().all():
         print("\n--- Generando Gráficos ---")
         # Asumiendo que plotting.py existe y tiene la función plot_kinematics
         try:
@@ -179,6 +358,8 @@ def main():
     else:
         print("\nNo hay suficientes datos cinemáticos para generar gráficos.")
 
+    # --- Exportación diferida del video (si corresponde) ---
+    render_deferred_video(args, video_full_path, annotations_path, output_video_full_path)
 
     end_time = time.time()
     print(f"\nProceso completado exitosamente en {end_time - start_time:.2f} segundos.")
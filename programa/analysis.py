@@ -8,13 +8,14 @@ import numpy as np
 # Importar el factor de conversión desde la configuración
 from programa.config import METERS_PER_PIXEL
 
-def calculate_kinematics(tracking_data_list):
+def calculate_kinematics(tracking_data_list, verbose=True):
     """
     Calcula velocidad y aceleración (en píxeles y metros) a partir de datos de tracking.
 
     Args:
     tracking_data_list (list): Lista de diccionarios producida por BallTracker.
                                [{'frame': f, 'x': x, 'y': y, 'time': t}, ...]
+    verbose (bool): Si es False no imprime mensajes (útil al procesar por bloques).
 
     Returns:
     pd.DataFrame: DataFrame con columnas originales y añadidas para dt, dx, dy,
@@ -31,7 +32,7 @@ def calculate_kinematics(tracking_data_list):
 
 
     if not tracking_data_list:
-        print("Advertencia: Lista de datos de tracking vacía.")
+        if verbose: print("Advertencia: Lista de datos de tracking vacía.")
         # Devolver DataFrame vacío con todas las columnas esperadas
         return pd.DataFrame(columns=columns)
 
@@ -45,8 +46,12 @@ def calculate_kinematics(tracking_data_list):
 
 
     if len(df) < 2:
-        print("No hay suficientes datos para calcular velocidad.")
-        # El DataFrame ya tiene las columnas como NaN
+        if verbose: print("No hay suficientes datos para calcular velocidad.")
+        # El DataFrame ya tiene las columnas como NaN; la posición sí se puede convertir
+        # (así un bloque de un solo punto en modo streaming coincide con el cálculo completo)
+        if METERS_PER_PIXEL > 0:
+            df['x_m'] = df['x'] * METERS_PER_PIXEL
+            df['y_m'] = df['y'] * METERS_PER_PIXEL
         return df
 
     # Calcular diferencias (para todos menos el primero)
@@ -62,17 +67,17 @@ def calculate_kinematics(tracking_data_list):
     # Los que tienen dt=0 o el primero quedan como NaN
 
     if len(df) < 3:
-        print("No hay suficientes datos para calcular aceleración.")
+        if verbose: print("No hay suficientes datos para calcular aceleración.")
          # El DataFrame ya tiene ax, ay como NaN
         # Calcular conversión a metros si es posible para posición y velocidad
         if METERS_PER_PIXEL > 0:
-            print(f"Aplicando conversión a metros (factor: {METERS_PER_PIXEL:.6f} m/px)")
+            if verbose: print(f"Aplicando conversión a metros (factor: {METERS_PER_PIXEL:.6f} m/px)")
             df['x_m'] = df['x'] * METERS_PER_PIXEL
             df['y_m'] = df['y'] * METERS_PER_PIXEL # Y también se escala
             df['vx_m'] = df['vx'] * METERS_PER_PIXEL
             df['vy_m'] = df['vy'] * METERS_PER_PIXEL
         elif 'x_m' not in columns: # Solo imprimir advertencia si no se hizo antes
-             print("Advertencia: No se realizó la conversión a metros. METERS_PER_PIXEL no es válido o es cero.")
+             if verbose: print("Advertencia: No se realizó la conversión a metros. METERS_PER_PIXEL no es válido o es cero.")
 
         return df
 
@@ -87,7 +92,7 @@ def calculate_kinematics(tracking_data_list):
 
     # --- Conversión a Metros ---
     if METERS_PER_PIXEL > 0:
-        print(f"Aplicando conversión a metros (factor: {METERS_PER_PIXEL:.6f} m/px)")
+        if verbose: print(f"Aplicando conversión a metros (factor: {METERS_PER_PIXEL:.6f} m/px)")
         df['x_m'] = df['x'] * METERS_PER_PIXEL
         df['y_m'] = df['y'] * METERS_PER_PIXEL # Y también se escala
         df['vx_m'] = df['vx'] * METERS_PER_PIXEL
@@ -95,11 +100,51 @@ def calculate_kinematics(tracking_data_list):
         df['ax_m'] = df['ax'] * METERS_PER_PIXEL
         df['ay_m'] = df['ay'] * METERS_PER_PIXEL
     elif 'x_m' not in columns: # Solo imprimir advertencia si no se hizo antes
-        print("Advertencia: No se realizó la conversión a metros. METERS_PER_PIXEL no es válido o es cero.")
+        if verbose: print("Advertencia: No se realizó la conversión a metros. METERS_PER_PIXEL no es válido o es cero.")
 
 
-    print("Cálculos de cinemática (píxeles y metros) completados.")
+    if verbose: print("Cálculos de cinemática (píxeles y metros) completados.")
     # Seleccionar y reordenar columnas para el output final si se desea
     # final_columns = [...]
     # return df[final_columns]
-    return df # Devolver todas las columnas calculadas
\ No newline at end of file
+    return df # Devolver todas las columnas calculadas
+
+
+def calculate_kinematics_central(tracking_data_list, verbose=True):
+    """
+    Igual que calculate_kinematics, pero estima velocidad y aceleración con
+    diferencias centradas (np.gradient, admite pasos de tiempo no uniformes).
+    Es menos ruidoso y no tiene el retraso de medio paso de la diferencia hacia atrás.
+
+    Args:
+    tracking_data_list (list): Lista de diccionarios producida por BallTracker.
+    verbose (bool): Si es False no imprime mensajes.
+
+    Returns:
+    pd.DataFrame: Mismas columnas que calculate_kinematics.
+    """
+    df = calculate_kinematics(tracking_data_list, verbose=verbose)
+    if len(df) < 2:
+        return df
+
+    t = df['time'].to_numpy(dtype=float)
+    df['vx'] = np.gradient(df['x'].to_numpy(dtype=float), t)
+    df['vy'] = np.gradient(df['y'].to_numpy(dtype=float), t)
+    df['dvx'] = df['vx'].diff()
+    df['dvy'] = df['vy'].diff()
+    if len(df) >= 3:
+        df['ax'] = np.gradient(df['vx'].to_numpy(dtype=float), t)
+        df['ay'] = np.gradient(df['vy'].to_numpy(dtype=float), t)
+
+    if METERS_PER_PIXEL > 0:
+        for col in ['vx', 'vy', 'ax', 'ay']:
+            df[col + '_m'] = df[col] * METERS_PER_PIXEL
+
+    return df
+
+
+# Estimadores de derivadas disponibles (nombre -> función con la misma firma)
+DERIVATIVE_ESTIMATORS = {
+    'backward': calculate_kinematics,       # Diferencia hacia atrás (por defecto)
+    'central': calculate_kinematics_central, # Diferencias centradas
+}
@@ -0,0 +1,28 @@
+# client.py
+"""
+Cliente liviano del servicio de tracking (programa/service.py).
+Sólo usa la biblioteca estándar para que enviar un trabajo no cargue OpenCV,
+pandas ni matplotlib en el proceso cliente.
+
+Protocolo: una línea JSON por trabajo {"video": ruta, "overrides": {...}} y una
+línea JSON de respuesta con status, csv, plots y timings.
+"""
+import json
+import os
+import socket
+
+from programa.service_config import SERVICE_HOST, SERVICE_PORT
+
+
+def submit_job(video_path, overrides=None, host=SERVICE_HOST, port=SERVICE_PORT, timeout=None):
+    """
+    Envía un trabajo al servicio por socket y espera la respuesta.
+
+    Returns:
+    dict: Respuesta del servicio (status, csv, plots, timings, ...).
+    """
+    job = {'video': os.path.abspath(video_path), 'overrides': overrides or {}}
+    with socket.create_connection((host, port), timeout=timeout) as conn:
+        conn.sendall((json.dumps(job) + '\n').encode('utf-8'))
+        with conn.makefile('r', encoding='utf-8') as reader:
+            return json.loads(reader.readline())
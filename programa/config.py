@@ -17,6 +17,11 @@ VALID_VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
 # --- Parámetros de Detección (USANDO SimpleBlobDetector) ---
 # Ajustando para detectar MANCHAS AZULES de una pelota de baloncesto.
 
+# Detector a usar: 'blob' (SimpleBlobDetector) o 'contour' (contorno de mayor área
+# sobre la misma máscara; alternativa más simple para comparar).
+DETECTOR_BACKEND = 'blob'
+DETECTOR_BACKENDS = ('blob', 'contour')
+
 # 1. Filtrado por Color/Intensidad
 FILTER_BY_COLOR = True # Usando máscara HSV
 BLOB_COLOR = 255       # Buscando blobs blancos en la máscara
@@ -75,4 +80,59 @@ OUTPUT_VIDEO_CODEC = 'mp4v'
 REFERENCE_OBJECT_HEIGHT_METERS = 0.32
 REFERENCE_OBJECT_HEIGHT_PIXELS = 150 # ¡¡¡ AJUSTAR !!!
 METERS_PER_PIXEL = (REFERENCE_OBJECT_HEIGHT_METERS / REFERENCE_OBJECT_HEIGHT_PIXELS
-                    if REFERENCE_OBJECT_HEIGHT_PIXELS > 0 else 0)
\ No newline at end of file
+                    if REFERENCE_OBJECT_HEIGHT_PIXELS > 0 else 0)
+
+# --- Modo Streaming (ejecuciones largas) ---
+# Cantidad de puntos detectados que se acumulan antes de volcarlos al CSV.
+STREAM_CHUNK_SIZE = 500
+# Segundos máximos entre checkpoints, aunque el bloque no esté lleno (o esté vacío).
+STREAM_FLUSH_INTERVAL_SECONDS = 10
+# Sufijo del archivo de checkpoint que permite reanudar una ejecución interrumpida.
+CHECKPOINT_FILENAME_SUFFIX = '_checkpoint.json'
+# Máximo de puntos que se grafican al final del modo streaming: el CSV se lee por
+# bloques conservando 1 de cada N filas, así la memoria no depende de la duración.
+STREAM_PLOT_MAX_POINTS = 20000
+
+# --- Vista Previa ---
+PREVIEW_WINDOW_NAME = "Tracking (Blob Detector) - Pelota ('q' para salir)"
+# Frecuencia (Hz) de refresco de la ventana en modo asíncrono (--async_preview).
+PREVIEW_REFRESH_HZ = 10
+
+# --- Exportación del Video con Tracking ---
+# Factor de escala de la resolución de salida (1.0 = resolución original).
+EXPORT_SCALE = 1.0
+# Escribir sólo 1 de cada N frames (1 = todos).
+EXPORT_FRAME_STRIDE = 1
+# Si es un número N, sólo se escriben los frames a N frames o menos de una detección.
+# None = escribir todo el video.
+EXPORT_DETECTION_MARGIN = None
+# Sufijo del archivo de anotaciones para la exportación diferida (--deferred_export).
+ANNOTATIONS_FILENAME_SUFFIX = '_annotations.csv'
+
+# --- Pruebas de Regresión (regression_harness.py) ---
+# Carpeta con los clips de referencia y su trayectoria real en '<clip>_ground_truth.csv'
+# (columnas frame, x, y; opcionalmente vx, vy, ax, ay en px/s y px/s²).
+REGRESSION_CORPUS_FOLDER = 'video/referencia'
+# Manifiesto opcional (en la carpeta del corpus) con clips guardados en otra carpeta
+REGRESSION_CORPUS_MANIFEST = 'corpus.json'
+GROUND_TRUTH_FILENAME_SUFFIX = '_ground_truth.csv'
+# Cache de detecciones por clip y detector (un JSON chico; se reutiliza entre ejecuciones)
+REGRESSION_CACHE_FOLDER = 'video/cache'
+# Resultados de referencia contra los que se comparan las nuevas ejecuciones
+REGRESSION_BASELINE_FILENAME = 'regression_baseline.json'
+# Límites absolutos (None = no se controla). Ajustados al clip de referencia
+# PeloAz: en el punto más alto (frames 15-30) la pared sobreexpuesta lava el azul de
+# la pelota y ningún detector la encuentra (64% de detección), y el centroide del
+# parche azul queda ~8.6 px corrido del centro real. Las regresiones las detecta
+# el baseline; estos límites son un piso, no la precisión deseada.
+REGRESSION_MAX_POSITION_RMSE_PX = 10.0
+REGRESSION_MAX_VELOCITY_RMSE_PX_S = None
+REGRESSION_MAX_ACCELERATION_RMSE_PX_S2 = None
+REGRESSION_MIN_DETECTION_RATE = 0.6
+REGRESSION_MIN_FPS = None
+# Tolerancias relativas respecto del baseline guardado
+REGRESSION_ERROR_TOLERANCE = 0.10 # El error puede empeorar hasta un 10%
+REGRESSION_FPS_TOLERANCE = 0.25   # Los FPS pueden bajar hasta un 25% (sólo con --check_fps)
+
+# --- Servicio de Tracking (service.py) ---
+# En programa/service_config.py: el cliente no debe importar este módulo (OpenCV, NumPy)
@@ -0,0 +1,240 @@
+# export.py
+"""
+Exportación del video con tracking.
+
+- VideoExporter: escribe el video anotado con opciones de escala, salto de frames
+  (stride), codec y escritura sólo de los frames cercanos a una detección. Las
+  anotaciones se dibujan únicamente en los frames que realmente se escriben.
+- AnnotationWriter / render_annotated_video: modo diferido. Durante el tracking
+  sólo se guardan las detecciones en un archivo CSV auxiliar (sidecar) y el video
+  se codifica después en una pasada separada, sin frenar al tracking.
+"""
+import csv
+import os
+from collections import deque
+
+import cv2
+
+from programa.config import (FONT, FONT_SCALE, FONT_COLOR_INFO, FONT_COLOR_DETECTED,
+    FONT_COLOR_NOT_DETECTED, FONT_THICKNESS, CIRCLE_COLOR, CIRCLE_THICKNESS,
+    OUTPUT_VIDEO_CODEC, EXPORT_SCALE, EXPORT_FRAME_STRIDE, EXPORT_DETECTION_MARGIN)
+
+ANNOTATION_COLUMNS = ['frame', 'time', 'x', 'y', 'size']
+
+
+def draw_tracking_overlay(frame, frame_number, timestamp, fps, detection):
+    """
+    Dibuja la información de tracking (círculo y texto) sobre el frame (in-place).
+
+    Args:
+    frame (np.ndarray): Frame BGR a anotar.
+    frame_number (int): Número de frame.
+    timestamp (float): Tiempo del frame en segundos.
+    fps (float): FPS del video (se muestra en el texto).
+    detection (tuple): (x, y, size) de la pelota en píxeles, o None si no se detectó.
+    """
+    if detection is not None:
+        x, y, size = int(detection[0]), int(detection[1]), detection[2]
+        radius = int(size / 2) # Aproximado
+        cv2.circle(frame, (x, y), radius, CIRCLE_COLOR, CIRCLE_THICKNESS)
+        cv2.putText(frame, f"Pos (px): ({x}, {y}) Sz: {size:.1f}", (10, 50), FONT, FONT_SCALE, FONT_COLOR_DETECTED, FONT_THICKNESS)
+    else:
+        cv2.putText(frame, "Pelota no detectada", (10, 50), FONT, FONT_SCALE, FONT_COLOR_NOT_DETECTED, FONT_THICKNESS)
+
+    cv2.putText(frame, f"Frame: {frame_number} Time: {timestamp:.2f}s FPS: {fps:.1f}", (10, 30), FONT, FONT_SCALE, FONT_COLOR_INFO, FONT_THICKNESS)
+    return frame
+
+
+class VideoExporter:
+    """
+    Envuelve cv2.VideoWriter y decide qué frames se escriben y a qué resolución.
+    """
+    def __init__(self, output_path, fps, frame_size, codec=OUTPUT_VIDEO_CODEC,
+                 scale=EXPORT_SCALE, stride=EXPORT_FRAME_STRIDE,
+                 detection_margin=EXPORT_DETECTION_MARGIN):
+        """
+        Args:
+        output_path (str): Ruta del video de salida.
+        fps (float): FPS del video original.
+        frame_size (tuple): (ancho, alto) del video original.
+        codec (str): FourCC del codec (ej: 'mp4v', 'avc1', 'MJPG').
+        scale (float): Factor de escala de la resolución de salida.
+        stride (int): Escribir sólo 1 de cada `stride` frames.
+        detection_margin (int): Si no es None, sólo se escriben los frames a esa
+                                distancia (en frames) o menos de una detección.
+        """
+        self.fps = fps
+        self.scale = scale if scale and scale > 0 else 1.0
+        self.stride = max(1, int(stride or 1))
+        self.detection_margin = detection_margin
+        self.frames_written = 0
+
+        width, height = frame_size
+        if self.scale != 1.0:
+            # Dimensiones pares: algunos codecs no aceptan tamaños impares
+            width = max(2, int(width * self.scale) // 2 * 2)
+            height = max(2, int(height * self.scale) // 2 * 2)
+        self.output_size = (width, height)
+
+        # Frames previos a una detección (pre-roll) y último frame del post-roll
+        self._pending = (deque(maxlen=detection_margin // self.stride + 1)
+                         if detection_margin is not None else None)
+        self._write_until = -1
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir: os.makedirs(output_dir, exist_ok=True)
+        fourcc = cv2.VideoWriter_fourcc(*codec)
+        # Con stride se reduce el FPS para conservar la duración real del video
+        self.writer = cv2.VideoWriter(output_path, fourcc, fps / self.stride, self.output_size)
+        if self.writer.isOpened():
+            print(f"Video de salida configurado en: {output_path} | Codec: {codec} | "
+                  f"Tamaño: {width}x{height} | Stride: {self.stride}"
+                  + (f" | Margen detección: {detection_margin}" if detection_margin is not None else ""))
+        else:
+            print(f"Error: No se pudo abrir VideoWriter para: {output_path} (codec '{codec}')")
+            self.writer = None
+
+    def is_open(self):
+        """True si el VideoWriter se abrió correctamente."""
+        return self.writer is not None
+
+    def is_stride_frame(self, frame_number):
+        """True si el frame corresponde al salto configurado."""
+        return frame_number % self.stride == 0
+
+    def submit(self, frame, frame_number, timestamp, detection):
+        """
+        Entrega un frame procesado. Se escribe (anotado) sólo si cumple el stride y,
+        en modo margen, si está cerca de una detección. El frame no se modifica.
+        Las detecciones cuentan aunque caigan en un frame que no cumple el stride,
+        igual que en la exportación diferida.
+        """
+        if self.writer is None: return
+
+        if self._pending is None:
+            if self.is_stride_frame(frame_number): self.write(frame, frame_number, timestamp, detection)
+            return
+
+        if detection is not None:
+            # Volcar el pre-roll y extender el post-roll
+            while self._pending:
+                pending = self._pending.popleft()
+                if pending[1] >= frame_number - self.detection_margin: self.write(*pending)
+            self._write_until = frame_number + self.detection_margin
+
+        if not self.is_stride_frame(frame_number): return
+        if frame_number <= self._write_until:
+            self.write(frame, frame_number, timestamp, detection)
+        else:
+            self._pending.append((frame, frame_number, timestamp, detection))
+
+    def write(self, frame, frame_number, timestamp, detection):
+        """Anota (sobre una copia) y escribe el frame, redimensionándolo si corresponde."""
+        if self.writer is None: return
+        annotated = draw_tracking_overlay(frame.copy(), frame_number, timestamp, self.fps, detection)
+        if annotated.shape[1] != self.output_size[0] or annotated.shape[0] != self.output_size[1]:
+            annotated = cv2.resize(annotated, self.output_size, interpolation=cv2.INTER_AREA)
+        self.writer.write(annotated)
+        self.frames_written += 1
+
+    def release(self):
+        """Cierra el archivo de video."""
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+        if self._pending is not None: self._pending.clear()
+
+
+class AnnotationWriter:
+    """
+    Guarda las detecciones en un CSV auxiliar (sidecar) para la exportación diferida.
+    Sólo se escriben los frames con detección; el resto se considera sin pelota.
+    """
+    def __init__(self, path):
+        output_dir = os.path.dirname(path)
+        if output_dir: os.makedirs(output_dir, exist_ok=True)
+        self.path = path
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(ANNOTATION_COLUMNS)
+
+    def write(self, frame_number, timestamp, detection):
+        """Registra una detección (x, y, size) del frame indicado."""
+        x, y, size = detection
+        self._csv.writerow([frame_number, timestamp, x, y, size])
+
+    def close(self):
+        """Cierra el archivo."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_annotations(path):
+    """
+    Lee el CSV de anotaciones.
+
+    Returns:
+    dict: {frame: (x, y, size)} con los frames en los que se detectó la pelota.
+    """
+    detections = {}
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            detections[int(row['frame'])] = (float(row['x']), float(row['y']), float(row['size']))
+    return detections
+
+
+def render_annotated_video(video_path, annotations_path, output_path, codec=OUTPUT_VIDEO_CODEC,
+                           scale=EXPORT_SCALE, stride=EXPORT_FRAME_STRIDE,
+                           detection_margin=EXPORT_DETECTION_MARGIN):
+    """
+    Segunda pasada de la exportación diferida: lee el video original y el CSV de
+    anotaciones y escribe el video anotado. Como las detecciones ya se conocen, los
+    frames que no se van a escribir se saltan sin decodificarlos (cap.grab()).
+
+    Returns:
+    int: Cantidad de frames escritos, o None si hubo un error.
+    """
+    try:
+        detections = load_annotations(annotations_path)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error al leer las anotaciones '{annotations_path}': {e}")
+        return None
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Error: No se pudo abrir el video en: {video_path}")
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    exporter = VideoExporter(output_path, fps, frame_size, codec=codec, scale=scale,
+                             stride=stride, detection_margin=detection_margin)
+    if not exporter.is_open():
+        cap.release()
+        return None
+
+    # Con margen: marcar de antemano los frames cercanos a alguna detección
+    frames_near_detection = None
+    if detection_margin is not None:
+        frames_near_detection = set()
+        for f in detections:
+            frames_near_detection.update(range(f - detection_margin, f + detection_margin + 1))
+
+    frame_number = 0
+    while True:
+        needed = exporter.is_stride_frame(frame_number) and (
+            frames_near_detection is None or frame_number in frames_near_detection)
+        if not needed:
+            if not cap.grab(): break
+        else:
+            ret, frame = cap.read()
+            if not ret: break
+            timestamp = frame_number / fps if fps > 0 else 0
+            exporter.write(frame, frame_number, timestamp, detections.get(frame_number))
+        frame_number += 1
+
+    cap.release()
+    exporter.release()
+    print(f"Video anotado (exportación diferida) guardado en: {output_path} ({exporter.frames_written} frames)")
+    return exporter.frames_written
@@ -14,10 +14,14 @@ def plot_kinematics(df: pd.DataFrame, output_folder: str, base_filename: str):
         df (pd.DataFrame): DataFrame con los datos cinemáticos.
         output_folder (str): Carpeta donde guardar las imágenes.
         base_filename (str): Nombre base de los archivos de salida.
+
+    Returns:
+        list: Rutas de los gráficos guardados.
     """
+    saved_paths = []
     if df.empty:
         print("DataFrame vacío, no se pueden generar gráficos.")
-        return
+        return saved_paths
 
     os.makedirs(output_folder, exist_ok=True)
 
@@ -40,6 +44,7 @@ def plot_kinematics(df: pd.DataFrame, output_folder: str, base_filename: str):
     plt.tight_layout(rect=[0, 0.03, 1, 0.95])
     pos_output_path = os.path.join(output_folder, f"{base_filename}_position.png")
     plt.savefig(pos_output_path)
+    saved_paths.append(pos_output_path)
     print(f"Gráfico de posición guardado en: {pos_output_path}")
     plt.close(fig_pos)
 
@@ -63,6 +68,7 @@ def plot_kinematics(df: pd.DataFrame, output_folder: str, base_filename: str):
         plt.tight_layout(rect=[0, 0.03, 1, 0.95])
         vel_output_path = os.path.join(output_folder, f"{base_filename}_velocity.png")
         plt.savefig(vel_output_path)
+        saved_paths.append(vel_output_path)
         print(f"Gráfico de velocidad guardado en: {vel_output_path}")
         plt.close(fig_vel)
     else:
@@ -88,7 +94,10 @@ def plot_kinematics(df: pd.DataFrame, output_folder: str, base_filename: str):
         plt.tight_layout(rect=[0, 0.03, 1, 0.95])
         acc_output_path = os.path.join(output_folder, f"{base_filename}_acceleration.png")
         plt.savefig(acc_output_path)
+        saved_paths.append(acc_output_path)
         print(f"Gráfico de aceleración guardado en: {acc_output_path}")
         plt.close(fig_acc)
     else:
-        print("No se graficó la aceleración (datos insuficientes o NaN).")
\ No newline at end of file
+        print("No se graficó la aceleración (datos insuficientes o NaN).")
+
+    return saved_paths
@@ -0,0 +1,113 @@
+# preview.py
+"""
+Ventana de vista previa asíncrona.
+
+La ventana se actualiza a una frecuencia fija y baja, mostrando siempre el último
+frame anotado y descartando el resto. Así el tracking corre a máxima velocidad y
+la ventana sigue respondiendo (incluida la tecla 'q').
+
+HighGUI (imshow, waitKey, destroyWindow) sólo es confiable desde el hilo principal
+(en macOS/Cocoa es obligatorio y con Qt aparecen advertencias o bloqueos), por eso
+la ventana corre en el hilo principal y el tracking en un hilo de trabajo.
+"""
+import threading
+import time
+
+import cv2
+
+from programa.config import PREVIEW_REFRESH_HZ
+
+
+def can_run_async_preview():
+    """True si se llama desde el hilo principal (requisito de HighGUI)."""
+    return threading.current_thread() is threading.main_thread()
+
+
+class AsyncPreview:
+    """
+    Muestra frames en una ventana de OpenCV desde el hilo principal mientras el
+    procesamiento corre en un hilo de trabajo (ver run_while).
+    """
+    def __init__(self, window_name, build_display, refresh_hz=PREVIEW_REFRESH_HZ):
+        """
+        Args:
+        window_name (str): Título de la ventana.
+        build_display (callable): Función (frame, mask) -> imagen a mostrar. Se
+                                  ejecuta en el hilo de la ventana, por lo que el
+                                  redimensionado no frena al tracking.
+        refresh_hz (float): Frecuencia de refresco de la ventana.
+        """
+        self.window_name = window_name
+        self.build_display = build_display
+        self.period = 1.0 / refresh_hz if refresh_hz and refresh_hz > 0 else 1.0 / PREVIEW_REFRESH_HZ
+
+        self._lock = threading.Lock()
+        self._latest = None           # (frame, mask) pendiente de mostrar
+        self._last_submit = 0.0
+        self._quit_event = threading.Event()
+
+    def wants_frame(self):
+        """Indica si ya pasó un período de refresco desde el último frame entregado."""
+        return time.perf_counter() - self._last_submit >= self.period
+
+    def submit(self, frame, mask=None):
+        """
+        Entrega un frame para mostrar. No bloquea: si el anterior aún no se mostró,
+        se reemplaza. El frame no debe modificarse después de entregarlo.
+        """
+        with self._lock:
+            self._latest = (frame, mask)
+        self._last_submit = time.perf_counter()
+
+    def quit_requested(self):
+        """True si el usuario presionó 'q' en la ventana."""
+        return self._quit_event.is_set()
+
+    def run_while(self, target, *args):
+        """
+        Ejecuta `target(*args)` en un hilo de trabajo y atiende la ventana en el hilo
+        actual (que debe ser el principal) hasta que el trabajo termine.
+
+        Returns:
+        El valor retornado por `target`. Si `target` lanza una excepción, se relanza aquí.
+        """
+        outcome = {}
+
+        def worker():
+            try:
+                outcome['result'] = target(*args)
+            except BaseException as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=worker, name="Tracking", daemon=True)
+        thread.start()
+        try:
+            while thread.is_alive():
+                tick_start = time.perf_counter()
+
+                with self._lock:
+                    latest, self._latest = self._latest, None
+
+                if latest is not None:
+                    try:
+                        cv2.imshow(self.window_name, self.build_display(*latest))
+                    except Exception as e:
+                        print(f"Error al mostrar la vista previa: {e}")
+
+                # waitKey también procesa los eventos de la ventana
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    self._quit_event.set()
+
+                remaining = self.period - (time.perf_counter() - tick_start)
+                if remaining > 0: thread.join(remaining)
+        except KeyboardInterrupt:
+            self._quit_event.set() # Pedir al tracking que termine limpiamente
+            thread.join()
+            raise
+        finally:
+            try: cv2.destroyWindow(self.window_name)
+            except cv2.error: pass # La ventana nunca llegó a crearse
+
+        thread.join()
+        if 'error' in outcome: raise outcome['error']
+        return outcome.get('result')
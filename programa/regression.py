@@ -0,0 +1,339 @@
+# regression.py
+"""
+Herramientas para comparar detectores y estimadores de derivadas contra una
+trayectoria real (ground truth) y detectar regresiones de precisión o velocidad.
+
+La detección se ejecuta una vez por clip y detector y se reutiliza para todos los
+estimadores. Las detecciones se guardan en un cache (un JSON chico por clip y
+detector) que se invalida al cambiar el video, la configuración o el código del
+detector, así las ejecuciones siguientes sólo recalculan la cinemática.
+"""
+import hashlib
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from programa import config
+from programa import tracker as tracker_module
+from programa.tracker import BallTracker
+from programa.analysis import DERIVATIVE_ESTIMATORS
+from programa.config import (VALID_VIDEO_EXTENSIONS, GROUND_TRUTH_FILENAME_SUFFIX, REGRESSION_CORPUS_MANIFEST,
+    REGRESSION_MAX_POSITION_RMSE_PX, REGRESSION_MAX_VELOCITY_RMSE_PX_S,
+    REGRESSION_MAX_ACCELERATION_RMSE_PX_S2, REGRESSION_MIN_DETECTION_RATE,
+    REGRESSION_MIN_FPS, REGRESSION_ERROR_TOLERANCE, REGRESSION_FPS_TOLERANCE)
+
+# Métricas de error (menor es mejor) y límites absolutos de config.py
+ERROR_LIMITS = {
+    'position_rmse': REGRESSION_MAX_POSITION_RMSE_PX,
+    'velocity_rmse': REGRESSION_MAX_VELOCITY_RMSE_PX_S,
+    'acceleration_rmse': REGRESSION_MAX_ACCELERATION_RMSE_PX_S2,
+}
+
+
+def list_corpus(corpus_folder):
+    """
+    Lista los clips del corpus: los videos de la carpeta y los indicados en el
+    manifiesto (REGRESSION_CORPUS_MANIFEST), que permite usar clips guardados en
+    otra carpeta sin copiarlos. Rutas relativas a la carpeta del corpus:
+        [{"video": "../entrada/PeloAz.mp4", "ground_truth": "PeloAz_ground_truth.csv"}]
+    Si una entrada no indica "ground_truth" se usa '<clip>_ground_truth.csv' en la
+    carpeta del corpus.
+
+    Returns:
+    list: Tuplas (ruta_video, ruta_ground_truth), exista o no el ground truth.
+    """
+    if not os.path.isdir(corpus_folder):
+        print(f"Error: La carpeta del corpus '{corpus_folder}' no existe.")
+        return []
+
+    def default_gt(video_path):
+        base = os.path.splitext(os.path.basename(video_path))[0]
+        return os.path.join(corpus_folder, base + GROUND_TRUTH_FILENAME_SUFFIX)
+
+    clips = []
+    for filename in sorted(os.listdir(corpus_folder)):
+        if filename.lower().endswith(VALID_VIDEO_EXTENSIONS):
+            video_path = os.path.join(corpus_folder, filename)
+            clips.append((video_path, default_gt(video_path)))
+
+    manifest_path = os.path.join(corpus_folder, REGRESSION_CORPUS_MANIFEST)
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            for entry in entries:
+                video_path = os.path.normpath(os.path.join(corpus_folder, entry['video']))
+                gt_path = (os.path.normpath(os.path.join(corpus_folder, entry['ground_truth']))
+                           if entry.get('ground_truth') else default_gt(video_path))
+                if not os.path.exists(video_path):
+                    print(f"Advertencia: El clip '{entry['video']}' del manifiesto no existe. Se omite.")
+                    continue
+                clips.append((video_path, gt_path))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error al leer el manifiesto del corpus '{manifest_path}': {e}")
+    return clips
+
+
+def find_reference_clips(corpus_folder):
+    """
+    Busca los clips del corpus que tienen trayectoria real asociada.
+
+    Returns:
+    list: Tuplas (ruta_video, ruta_ground_truth).
+    """
+    clips = []
+    for video_path, gt_path in list_corpus(corpus_folder):
+        if os.path.exists(gt_path):
+            clips.append((video_path, gt_path))
+        else:
+            print(f"Advertencia: '{os.path.basename(video_path)}' no tiene ground truth "
+                  f"({os.path.basename(gt_path)}). Se omite.")
+    return clips
+
+
+def load_ground_truth(gt_path, fps):
+    """
+    Lee la trayectoria real. Las columnas frame, x, y son obligatorias; vx, vy, ax, ay
+    son opcionales y deben venir de una fuente independiente de los estimadores que
+    se evalúan (ej: ajuste del tiro vertical). Si faltan (o una celda está vacía) la
+    derivada queda en NaN y en esos frames sólo se compara la posición.
+
+    Returns:
+    pd.DataFrame: Columnas frame, time, x, y, vx, vy, ax, ay.
+    """
+    gt = pd.read_csv(gt_path)
+    missing = {'frame', 'x', 'y'} - set(gt.columns)
+    if missing:
+        raise ValueError(f"Al ground truth '{gt_path}' le faltan las columnas: {', '.join(sorted(missing))}")
+    gt = gt.sort_values('frame').reset_index(drop=True)
+    gt['time'] = gt['frame'] / fps
+    for col in ['vx', 'vy', 'ax', 'ay']:
+        if col not in gt.columns: gt[col] = np.nan
+    return gt[['frame', 'time', 'x', 'y', 'vx', 'vy', 'ax', 'ay']]
+
+
+def detector_fingerprint(detector_backend):
+    """
+    Huella de la configuración del detector: los parámetros de config.py y el
+    código de tracker.py. Si cambia cualquiera de los dos, las detecciones
+    guardadas en el cache dejan de valer.
+    """
+    digest = hashlib.sha1(detector_backend.encode('utf-8'))
+    for name in sorted(vars(config)):
+        if name.isupper():
+            digest.update(f"{name}={getattr(config, name)!r}\n".encode('utf-8'))
+    with open(tracker_module.__file__, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def run_detector(video_path, detector_backend):
+    """
+    Ejecuta la detección sobre todos los frames del video. Sólo se mide el tiempo
+    de detección (la decodificación no cuenta para los FPS).
+
+    Returns:
+    tuple: (tracking_data, fps_video, fps_procesamiento) con tracking_data en el
+           mismo formato que BallTracker.track, o (None, None, None) si no se pudo
+           leer el video.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Error: No se pudo abrir el video en: {video_path}")
+        return None, None, None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+
+    tracker = BallTracker(detector_backend=detector_backend)
+    tracking_data = []
+    frame_number = 0
+    elapsed = 0.0
+    while True:
+        ret, frame = cap.read()
+        if not ret: break
+        start = time.perf_counter()
+        detection = tracker.detect_frame(frame)
+        elapsed += time.perf_counter() - start
+        if detection is not None:
+            tracking_data.append({'frame': frame_number, 'x': int(detection[0]),
+                                  'y': int(detection[1]), 'time': frame_number / fps})
+        frame_number += 1
+    cap.release()
+    return tracking_data, fps, (frame_number / elapsed if elapsed > 0 else float('inf'))
+
+
+def detect_clip(video_path, detector_backend, cache_folder, use_cache=True):
+    """
+    Detecciones de un clip, reutilizando las guardadas en el cache si el video, el
+    detector y su configuración (detector_fingerprint) no cambiaron. El cache es
+    un JSON chico por clip y detector (sólo los puntos detectados).
+
+    Returns:
+    dict: tracking_data, fps (del video), processing_fps y cached (True si vino del
+          cache; en ese caso processing_fps es el de la ejecución que lo generó),
+          o None si no se pudo leer el video.
+    """
+    stat = os.stat(video_path)
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    key = f"{base}_{stat.st_size}_{stat.st_mtime_ns}_{detector_backend}_{detector_fingerprint(detector_backend)}"
+    cache_path = os.path.join(cache_folder, key + '.json')
+
+    if use_cache and os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        return {**cached, 'cached': True}
+
+    tracking_data, fps, processing_fps = run_detector(video_path, detector_backend)
+    if tracking_data is None: return None
+    result = {'tracking_data': tracking_data, 'fps': fps, 'processing_fps': processing_fps}
+
+    os.makedirs(cache_folder, exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({**result, 'video': video_path}, f)
+    os.replace(tmp_path, cache_path)
+    return {**result, 'cached': False}
+
+
+def _rmse(estimated, reference):
+    """RMSE de la norma del error vectorial, ignorando filas con NaN."""
+    error = (estimated - reference).dropna()
+    if error.empty: return float('nan')
+    return float(np.sqrt((error ** 2).sum(axis=1).mean()))
+
+
+def compare_to_ground_truth(kinematics_df, gt):
+    """
+    Compara la cinemática estimada con la trayectoria real (frame a frame).
+
+    Returns:
+    dict: detection_rate, position_rmse (px), velocity_rmse (px/s) y
+          acceleration_rmse (px/s²). Las métricas sin referencia son NaN.
+    """
+    merged = gt.merge(kinematics_df[['frame', 'x', 'y', 'vx', 'vy', 'ax', 'ay']],
+                      on='frame', how='inner', suffixes=('_gt', ''))
+    metrics = {'detection_rate': len(merged) / len(gt) if len(gt) else float('nan')}
+    for name, cols in (('position_rmse', ['x', 'y']),
+                       ('velocity_rmse', ['vx', 'vy']),
+                       ('acceleration_rmse', ['ax', 'ay'])):
+        estimated = merged[cols].astype(float)
+        reference = merged[[c + '_gt' for c in cols]].astype(float)
+        reference.columns = cols
+        metrics[name] = _rmse(estimated, reference)
+    return metrics
+
+
+def run_matrix(clips, detector_backends, estimators, cache_folder, use_cache=True):
+    """
+    Evalúa todas las combinaciones detector x estimador sobre los clips.
+    La detección se ejecuta (o se lee del cache) una vez por clip y detector, y se
+    reutiliza para todos los estimadores.
+
+    Returns:
+    list: Un diccionario de resultados por combinación (clip, detector, estimador).
+    """
+    results = []
+    for video_path, gt_path in clips:
+        clip = os.path.basename(video_path)
+        gt = None
+        for backend in detector_backends:
+            detections = detect_clip(video_path, backend, cache_folder, use_cache=use_cache)
+            if detections is None: break
+            if gt is None:
+                try:
+                    gt = load_ground_truth(gt_path, detections['fps'])
+                except (OSError, ValueError) as e:
+                    print(f"Error: {e}")
+                    break
+            for estimator in estimators:
+                kinematics_df = DERIVATIVE_ESTIMATORS[estimator](detections['tracking_data'], verbose=False)
+                if kinematics_df.empty:
+                    metrics = {'detection_rate': 0.0, 'position_rmse': float('nan'),
+                               'velocity_rmse': float('nan'), 'acceleration_rmse': float('nan')}
+                else:
+                    metrics = compare_to_ground_truth(kinematics_df, gt)
+                results.append({'clip': clip, 'detector': backend, 'estimator': estimator,
+                                'fps': detections['processing_fps'], 'cached': detections['cached'],
+                                **metrics})
+    return results
+
+
+def result_key(result):
+    """Clave única de una combinación (para comparar con el baseline)."""
+    return f"{result['clip']}|{result['detector']}|{result['estimator']}"
+
+
+def load_baseline(path):
+    """Lee el baseline guardado. Retorna {} si no existe."""
+    if not os.path.exists(path): return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results, path):
+    """Guarda los resultados como nuevo baseline."""
+    baseline = {result_key(r): {k: r[k] for k in ('fps', 'detection_rate', *ERROR_LIMITS)}
+                for r in results}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"Baseline guardado en: {path}")
+
+
+def check_results(results, baseline, check_fps=False):
+    """
+    Controla los límites absolutos de config.py y, si hay baseline, que el error no
+    haya empeorado más allá de las tolerancias relativas. Los FPS se controlan sólo
+    con `check_fps`, porque el baseline guarda los de la máquina que lo generó.
+
+    Returns:
+    list: Mensajes de las regresiones encontradas (vacía si todo está bien).
+    """
+    failures = []
+    for r in results:
+        key = result_key(r)
+
+        if np.isnan(r['position_rmse']):
+            failures.append(f"{key}: no hay frames detectados en común con el ground truth")
+        if REGRESSION_MIN_DETECTION_RATE is not None and r['detection_rate'] < REGRESSION_MIN_DETECTION_RATE:
+            failures.append(f"{key}: tasa de detección {r['detection_rate']:.2%} < {REGRESSION_MIN_DETECTION_RATE:.2%}")
+        for metric, limit in ERROR_LIMITS.items():
+            if limit is not None and r[metric] > limit:
+                failures.append(f"{key}: {metric} {r[metric]:.3f} > {limit}")
+        if check_fps and REGRESSION_MIN_FPS is not None and r['fps'] < REGRESSION_MIN_FPS:
+            failures.append(f"{key}: {r['fps']:.1f} FPS < {REGRESSION_MIN_FPS}")
+
+        reference = baseline.get(key)
+        if reference is None: continue
+        for metric in ERROR_LIMITS:
+            # Margen absoluto mínimo para no fallar por ruido numérico cuando el error es ~0
+            allowed = reference[metric] * (1 + REGRESSION_ERROR_TOLERANCE) + 1e-6
+            if r[metric] > allowed and not np.isnan(reference[metric]):
+                failures.append(f"{key}: {metric} {r[metric]:.3f} empeoró respecto del baseline "
+                                f"({reference[metric]:.3f}, tolerancia {REGRESSION_ERROR_TOLERANCE:.0%})")
+        allowed_rate = reference['detection_rate'] * (1 - REGRESSION_ERROR_TOLERANCE)
+        if r['detection_rate'] < allowed_rate:
+            failures.append(f"{key}: tasa de detección {r['detection_rate']:.2%} empeoró respecto del "
+                            f"baseline ({reference['detection_rate']:.2%})")
+        if check_fps and r['fps'] < reference['fps'] * (1 - REGRESSION_FPS_TOLERANCE):
+            failures.append(f"{key}: {r['fps']:.1f} FPS, más lento que el baseline "
+                            f"({reference['fps']:.1f} FPS, tolerancia {REGRESSION_FPS_TOLERANCE:.0%})")
+    return failures
+
+
+def bootstrap_ground_truth(video_path, gt_path, cache_folder, detector_backend='blob'):
+    """
+    Crea un ground truth inicial a partir de la detección actual. Sirve como
+    referencia de regresión; para medir precisión real conviene corregirlo a mano.
+    Sólo guarda posiciones: derivarlas con los mismos estimadores que se evalúan
+    haría que la comparación se midiera contra sí misma.
+    """
+    detections = detect_clip(video_path, detector_backend, cache_folder)
+    if detections is None: return False
+    tracking_data = detections['tracking_data']
+    gt = pd.DataFrame(tracking_data, columns=['frame', 'x', 'y', 'time'])
+    gt[['frame', 'x', 'y']].to_csv(gt_path, index=False)
+    print(f"Ground truth inicial ({len(tracking_data)} puntos, detector '{detector_backend}') guardado en: {gt_path}")
+    return True
@@ -0,0 +1,331 @@
+# service.py
+"""
+Servicio residente de tracking.
+
+Mantiene instancias de BallTracker ya inicializadas ("calientes") y procesa
+trabajos (ruta de video + configuración) con concurrencia acotada, evitando
+relanzar Python, reimportar OpenCV/pandas/matplotlib y reconstruir el detector
+para cada clip. Los trabajos llegan por un socket local (una línea JSON por
+trabajo) o por una carpeta vigilada (un archivo .json por trabajo).
+El cliente liviano para enviar trabajos está en programa/client.py.
+"""
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg') # Sin ventanas: los gráficos sólo se guardan en archivos
+
+from programa.tracker import BallTracker
+from programa.analysis import DERIVATIVE_ESTIMATORS
+from programa.plotting import plot_kinematics
+from programa.config import (VIDEO_OUTPUT_FOLDER, DEFAULT_OUTPUT_FILENAME_SUFFIX,
+    OUTPUT_VIDEO_EXTENSION, OUTPUT_VIDEO_CODEC, EXPORT_SCALE, EXPORT_FRAME_STRIDE,
+    EXPORT_DETECTION_MARGIN, DETECTOR_BACKEND, DETECTOR_BACKENDS)
+from programa.service_config import (SERVICE_HOST, SERVICE_PORT, SERVICE_MAX_CONCURRENT_JOBS,
+    SERVICE_POLL_INTERVAL, JOB_OPTIONS)
+
+# Valores por defecto de cada opción de JOB_OPTIONS
+JOB_DEFAULTS = {
+    'output_folder': VIDEO_OUTPUT_FOLDER,
+    'output_suffix': DEFAULT_OUTPUT_FILENAME_SUFFIX,
+    'detector': DETECTOR_BACKEND,
+    'estimator': 'backward',
+    'save_csv': True,
+    'save_plots': True,
+    'save_video': False, # Codificar el video es lo más lento; se pide explícitamente
+    'codec': OUTPUT_VIDEO_CODEC,
+    'export_scale': EXPORT_SCALE,
+    'export_stride': EXPORT_FRAME_STRIDE,
+    'export_margin': EXPORT_DETECTION_MARGIN,
+}
+
+# pyplot no es thread-safe: los gráficos se generan de a uno
+_plot_lock = threading.Lock()
+
+
+class TrackerPool:
+    """
+    Conjunto de BallTracker inicializados, agrupados por detector. Cada trabajo
+    toma uno exclusivo y lo devuelve al terminar, así se reutilizan entre trabajos.
+    """
+    def __init__(self):
+        self._idle = {} # detector -> queue.LifoQueue de trackers libres
+        self._lock = threading.Lock()
+
+    def _queue_for(self, detector_backend):
+        with self._lock:
+            return self._idle.setdefault(detector_backend, queue.LifoQueue())
+
+    def warm_up(self, detector_backend, count):
+        """Crea `count` trackers por adelantado para el detector indicado."""
+        idle = self._queue_for(detector_backend)
+        for _ in range(count):
+            idle.put(BallTracker(detector_backend=detector_backend))
+
+    def acquire(self, detector_backend):
+        """Retorna un tracker libre (o crea uno nuevo si no hay)."""
+        try:
+            return self._queue_for(detector_backend).get_nowait()
+        except queue.Empty:
+            return BallTracker(detector_backend=detector_backend)
+
+    def release(self, tracker):
+        """Devuelve el tracker al conjunto de libres."""
+        self._queue_for(tracker.detector_backend).put(tracker)
+
+
+def resolve_job_config(overrides):
+    """
+    Combina JOB_DEFAULTS con las opciones del trabajo y valida tipos y rangos
+    (las mismas reglas que main.py aplica a los argumentos equivalentes).
+
+    Raises:
+    ValueError: Si hay opciones desconocidas o valores inválidos.
+    """
+    overrides = overrides or {}
+    if not isinstance(overrides, dict):
+        raise ValueError("'overrides' debe ser un objeto JSON")
+    unknown = set(overrides) - set(JOB_OPTIONS)
+    if unknown:
+        raise ValueError(f"Opciones desconocidas: {', '.join(sorted(unknown))}")
+    config = {**JOB_DEFAULTS, **overrides}
+
+    for key in ('output_folder', 'output_suffix'):
+        if not isinstance(config[key], str) or not config[key]:
+            raise ValueError(f"'{key}' debe ser un texto no vacío")
+    if not isinstance(config['codec'], str) or len(config['codec']) != 4:
+        raise ValueError("'codec' debe ser un FourCC de 4 caracteres (ej: 'mp4v')")
+    for key in ('save_csv', 'save_plots', 'save_video'):
+        if not isinstance(config[key], bool):
+            raise ValueError(f"'{key}' debe ser true o false")
+    if config['detector'] not in DETECTOR_BACKENDS:
+        raise ValueError(f"Detector desconocido '{config['detector']}'. Opciones: {', '.join(DETECTOR_BACKENDS)}")
+    if config['estimator'] not in DERIVATIVE_ESTIMATORS:
+        raise ValueError(f"Estimador desconocido '{config['estimator']}'. Opciones: {', '.join(DERIVATIVE_ESTIMATORS)}")
+
+    # bool es subclase de int: se excluye para no aceptar true como 1
+    scale, stride, margin = config['export_scale'], config['export_stride'], config['export_margin']
+    if isinstance(scale, bool) or not isinstance(scale, (int, float)) or not scale > 0:
+        raise ValueError("'export_scale' debe ser un número mayor que cero")
+    if isinstance(stride, bool) or not isinstance(stride, int) or stride <= 0:
+        raise ValueError("'export_stride' debe ser un entero mayor que cero")
+    if margin is not None and (isinstance(margin, bool) or not isinstance(margin, int) or margin < 0):
+        raise ValueError("'export_margin' debe ser null o un entero no negativo")
+    return config
+
+
+def process_job(tracker, video_path, config):
+    """
+    Ejecuta el análisis completo de un video con un tracker ya inicializado:
+    tracking, cinemática, CSV y gráficos.
+
+    Returns:
+    dict: Rutas generadas, cantidad de puntos y tiempos (en segundos) de cada etapa.
+    """
+    timings = {}
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    output_folder = config['output_folder']
+    os.makedirs(output_folder, exist_ok=True)
+
+    output_video_path = None
+    if config['save_video']:
+        output_video_path = os.path.join(output_folder, base + '_tracked' + OUTPUT_VIDEO_EXTENSION)
+
+    stage_start = time.perf_counter()
+    tracking_data = tracker.track(video_path, output_video_path=output_video_path, show_video=False,
+                                  video_codec=config['codec'], export_scale=config['export_scale'],
+                                  export_stride=config['export_stride'],
+                                  export_margin=config['export_margin'])
+    timings['track'] = time.perf_counter() - stage_start
+    if tracking_data is None:
+        raise ValueError(f"No se pudo abrir el video: {video_path}")
+
+    result = {'points': len(tracking_data), 'csv': None, 'plots': [],
+              'video_output': output_video_path, 'timings': timings}
+    if not tracking_data:
+        return result
+
+    stage_start = time.perf_counter()
+    kinematics_df = DERIVATIVE_ESTIMATORS[config['estimator']](tracking_data, verbose=False)
+    timings['analysis'] = time.perf_counter() - stage_start
+
+    if config['save_csv']:
+        stage_start = time.perf_counter()
+        csv_path = os.path.join(output_folder, base + config['output_suffix'])
+        kinematics_df.to_csv(csv_path, index=False, float_format='%.5f')
+        result['csv'] = csv_path
+        timings['csv'] = time.perf_counter() - stage_start
+
+    if config['save_plots']:
+        stage_start = time.perf_counter()
+        with _plot_lock:
+            result['plots'] = plot_kinematics(kinematics_df, output_folder=output_folder, base_filename=base)
+        timings['plots'] = time.perf_counter() - stage_start
+
+    return result
+
+
+class TrackingService:
+    """
+    Procesa trabajos en un pool de hilos de tamaño fijo usando trackers calientes.
+    """
+    def __init__(self, max_workers=SERVICE_MAX_CONCURRENT_JOBS):
+        self.max_workers = max_workers
+        self.pool = TrackerPool()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        # Salidas (carpeta, nombre base) de los trabajos en curso, para evitar que
+        # dos trabajos sobre videos con el mismo nombre se pisen los archivos
+        self._active_outputs = set()
+        self._outputs_lock = threading.Lock()
+
+    def warm_up(self, detector_backends=(DETECTOR_BACKEND,)):
+        """Inicializa por adelantado un tracker por hilo para cada detector."""
+        for backend in detector_backends:
+            self.pool.warm_up(backend, self.max_workers)
+
+    def submit(self, job):
+        """
+        Encola un trabajo {'video': ruta, 'overrides': {...}, 'id': opcional}.
+
+        Returns:
+        concurrent.futures.Future: Se resuelve con el diccionario de resultado.
+        """
+        return self.executor.submit(self._run_job, job, time.perf_counter())
+
+    def _run_job(self, job, submitted_at):
+        """Ejecuta un trabajo y arma la respuesta (nunca lanza excepciones)."""
+        started_at = time.perf_counter()
+        response = {'id': job.get('id') or uuid.uuid4().hex, 'video': job.get('video')}
+        tracker = None
+        output_key = None
+        try:
+            video_path = job.get('video')
+            if not isinstance(video_path, str) or not os.path.isfile(video_path):
+                raise ValueError(f"No existe el video: {video_path}")
+            config = resolve_job_config(job.get('overrides'))
+            output_key = self._reserve_outputs(video_path, config['output_folder'])
+            tracker = self.pool.acquire(config['detector'])
+            response.update(process_job(tracker, video_path, config))
+            response['status'] = 'ok'
+        except Exception as e:
+            response['status'] = 'error'
+            response['error'] = str(e)
+            response.setdefault('timings', {})
+            # Un error a mitad del tracking puede dejar abiertos los videos del tracker
+            if tracker is not None: tracker.release()
+        finally:
+            if tracker is not None: self.pool.release(tracker)
+            if output_key is not None:
+                with self._outputs_lock:
+                    self._active_outputs.discard(output_key)
+
+        response['timings']['queue'] = started_at - submitted_at
+        response['timings']['total'] = time.perf_counter() - submitted_at
+        print(f"Trabajo {response['id']} ({response['video']}): {response['status']} "
+              f"en {response['timings']['total']:.3f} s")
+        return response
+
+    def _reserve_outputs(self, video_path, output_folder):
+        """
+        Registra la salida del trabajo (carpeta + nombre base del video).
+
+        Raises:
+        ValueError: Si otro trabajo en curso escribe los mismos archivos.
+        """
+        base = os.path.splitext(os.path.basename(video_path))[0]
+        output_key = (os.path.normcase(os.path.abspath(output_folder)), base)
+        with self._outputs_lock:
+            if output_key in self._active_outputs:
+                raise ValueError(f"Otro trabajo en curso ya escribe los resultados de '{base}' en "
+                                 f"'{output_folder}'. Usar otro 'output_folder' o esperar a que termine.")
+            self._active_outputs.add(output_key)
+        return output_key
+
+    def shutdown(self):
+        """Espera a que terminen los trabajos en curso y libera los hilos."""
+        self.executor.shutdown(wait=True)
+
+
+class _JobRequestHandler(socketserver.StreamRequestHandler):
+    """Protocolo del socket: una línea JSON por trabajo, una línea JSON por respuesta."""
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line: continue
+            try:
+                job = json.loads(line)
+                if not isinstance(job, dict): raise ValueError("El trabajo debe ser un objeto JSON")
+                response = self.server.service.submit(job).result()
+            except ValueError as e:
+                response = {'status': 'error', 'error': f"Trabajo inválido: {e}"}
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class _ThreadingJobServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve_socket(service, host=SERVICE_HOST, port=SERVICE_PORT):
+    """Atiende trabajos por TCP en host:port hasta Ctrl+C."""
+    with _ThreadingJobServer((host, port), _JobRequestHandler) as server:
+        server.service = service
+        print(f"Servicio de tracking escuchando en {host}:{port} "
+              f"({service.max_workers} trabajos en paralelo). Ctrl+C para salir.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nDeteniendo el servicio...")
+
+
+def watch_folder(service, jobs_folder, poll_interval=SERVICE_POLL_INTERVAL):
+    """
+    Procesa los archivos '<nombre>.json' que aparecen en la carpeta de trabajos.
+    El archivo se renombra a '.processing' al tomarlo y la respuesta se escribe en
+    '<nombre>.result.json'. Se ejecuta hasta Ctrl+C.
+    """
+    os.makedirs(jobs_folder, exist_ok=True)
+    print(f"Vigilando la carpeta de trabajos '{jobs_folder}' "
+          f"({service.max_workers} trabajos en paralelo). Ctrl+C para salir.")
+
+    def write_result(response, job_path):
+        result_path = job_path[:-len('.processing')] + '.result.json'
+        tmp_path = result_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(response, f, indent=2)
+        os.replace(tmp_path, result_path) # El cliente nunca ve un resultado a medio escribir
+        os.remove(job_path)
+
+    try:
+        while True:
+            for filename in sorted(os.listdir(jobs_folder)):
+                if not filename.endswith('.json') or filename.endswith('.result.json'): continue
+                job_path = os.path.join(jobs_folder, filename)
+                processing_path = job_path[:-len('.json')] + '.processing'
+                try:
+                    os.replace(job_path, processing_path) # Tomar el trabajo
+                except OSError:
+                    continue # Otro proceso lo tomó primero
+                try:
+                    with open(processing_path, 'r', encoding='utf-8') as f:
+                        job = json.load(f)
+                    if not isinstance(job, dict): raise ValueError("El trabajo debe ser un objeto JSON")
+                except (OSError, ValueError) as e:
+                    print(f"Error al leer el trabajo '{filename}': {e}")
+                    write_result({'id': filename[:-len('.json')], 'status': 'error',
+                                  'error': f"Trabajo inválido: {e}"}, processing_path)
+                    continue
+                job.setdefault('id', filename[:-len('.json')])
+                future = service.submit(job)
+                future.add_done_callback(lambda fut, path=processing_path: write_result(fut.result(), path))
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\nDeteniendo el servicio...")
+
@@ -0,0 +1,21 @@
+# service_config.py
+"""
+Configuración del servicio de tracking que necesita también el cliente.
+Sólo usa la biblioteca estándar: config.py importa OpenCV y NumPy, y el cliente
+(programa/client.py) no debería cargarlos sólo para enviar un trabajo.
+"""
+
+# --- Servicio de Tracking (service.py) ---
+SERVICE_HOST = '127.0.0.1' # Sólo conexiones locales
+SERVICE_PORT = 8765
+# Trabajos procesados en paralelo (cada uno usa su propio BallTracker)
+SERVICE_MAX_CONCURRENT_JOBS = 2
+# Carpeta vigilada en modo cola por directorio: cada trabajo es un archivo .json
+SERVICE_JOBS_FOLDER = 'video/trabajos'
+SERVICE_POLL_INTERVAL = 0.5 # Segundos entre revisiones de la carpeta
+
+# Opciones que un trabajo puede sobreescribir con 'overrides'
+# (los valores por defecto están en JOB_DEFAULTS de programa/service.py)
+JOB_OPTIONS = ('output_folder', 'output_suffix', 'detector', 'estimator', 'save_csv',
+               'save_plots', 'save_video', 'codec', 'export_scale', 'export_stride',
+               'export_margin')
@@ -0,0 +1,169 @@
+# streaming.py
+"""
+Escritura por bloques (streaming) de los resultados de tracking y cinemática.
+
+Pensado para grabaciones largas: en lugar de acumular todos los puntos en memoria
+hasta el final, el tracker entrega bloques de tamaño fijo que se calculan y se
+agregan al CSV de salida. Después de cada bloque se guarda un checkpoint con la
+posición del video y el estado necesario para reanudar si el proceso se corta.
+"""
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from programa.analysis import calculate_kinematics
+from programa.config import STREAM_CHUNK_SIZE, STREAM_PLOT_MAX_POINTS
+
+# Cantidad de muestras previas necesarias para que las diferencias (velocidad y
+# aceleración) del primer punto de un bloque coincidan con el cálculo completo.
+CONTEXT_SAMPLES = 2
+
+
+def read_csv_downsampled(csv_path, columns, total_rows, max_points=STREAM_PLOT_MAX_POINTS,
+                         chunk_rows=STREAM_CHUNK_SIZE):
+    """
+    Lee un CSV por bloques conservando 1 de cada N filas (espaciadas de forma
+    regular), de modo que el resultado no supere `max_points` filas y la memoria no
+    crezca con el tamaño del archivo. Pensado para graficar resultados largos.
+
+    Returns:
+    tuple: (DataFrame con las columnas pedidas, N).
+    """
+    step = max(1, math.ceil(total_rows / max_points)) if max_points else 1
+    parts = []
+    offset = 0
+    for chunk in pd.read_csv(csv_path, usecols=columns, chunksize=chunk_rows):
+        keep = np.arange(offset, offset + len(chunk)) % step == 0
+        parts.append(chunk[keep])
+        offset += len(chunk)
+    if not parts: return pd.DataFrame(columns=columns), step
+    return pd.concat(parts, ignore_index=True), step
+
+
+def describe_source(video_path, detector_backend):
+    """
+    Identifica la entrada de un procesamiento en streaming (video y detector), para
+    no mezclar en el mismo CSV resultados de otro video o de otro detector al reanudar.
+    """
+    stat = os.stat(video_path)
+    return {'video': os.path.abspath(video_path), 'video_size': stat.st_size,
+            'detector': detector_backend}
+
+
+class StreamingResultsWriter:
+    """
+    Calcula la cinemática por bloques y la agrega a un CSV, guardando un checkpoint
+    (JSON) luego de cada bloque para poder reanudar el procesamiento.
+    """
+    def __init__(self, csv_path, checkpoint_path, resume=False, source=None):
+        """
+        Args:
+        csv_path (str): Ruta del CSV de salida (se agrega al final en cada bloque).
+        checkpoint_path (str): Ruta del archivo JSON de checkpoint.
+        resume (bool): Si es True, continúa desde el checkpoint existente.
+                       Si es False, empieza de cero borrando resultados previos.
+        source (dict): Datos que identifican la entrada (ver describe_source). Se
+                       guardan en el checkpoint y al reanudar deben coincidir.
+
+        Raises:
+        ValueError: Si resume es True y no hay un checkpoint válido para esta entrada
+                    (el CSV parcial no se toca).
+        """
+        self.csv_path = csv_path
+        self.checkpoint_path = checkpoint_path
+        self.source = source or {}
+        self.next_frame = 0       # Primer frame que falta procesar
+        self.rows_written = 0     # Filas ya volcadas al CSV
+        self.csv_bytes = 0        # Tamaño del CSV consistente con el checkpoint
+        self.context = []         # Últimas muestras (para calcular diferencias)
+
+        if resume:
+            self._load_checkpoint()
+            # Descartar filas escritas después del último checkpoint (corte a mitad de bloque)
+            if os.path.exists(self.csv_path):
+                with open(self.csv_path, 'r+b') as f:
+                    f.truncate(self.csv_bytes)
+            print(f"Reanudando desde el frame {self.next_frame} ({self.rows_written} filas ya guardadas).")
+        else:
+            for path in (self.csv_path, self.checkpoint_path):
+                if os.path.exists(path): os.remove(path)
+
+    def _load_checkpoint(self):
+        """
+        Carga el estado desde el checkpoint.
+
+        Raises:
+        ValueError: Si no existe, es inválido o corresponde a otra entrada.
+        """
+        if not os.path.exists(self.checkpoint_path):
+            raise ValueError(f"No existe checkpoint en '{self.checkpoint_path}'; no hay nada que reanudar.")
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            next_frame = int(state['next_frame'])
+            rows_written = int(state['rows_written'])
+            csv_bytes = int(state['csv_bytes'])
+            context = list(state['context'])
+            source = dict(state.get('source') or {})
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Checkpoint inválido en '{self.checkpoint_path}' ({e}).") from e
+
+        changed = [key for key in self.source if source.get(key) != self.source[key]]
+        if changed:
+            details = ', '.join(f"{key}: {source.get(key)!r} -> {self.source[key]!r}" for key in changed)
+            raise ValueError(f"El checkpoint corresponde a otra entrada ({details}).")
+        if rows_written > 0 and (not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) < csv_bytes):
+            raise ValueError(f"El CSV '{self.csv_path}' no tiene las filas que indica el checkpoint.")
+
+        self.next_frame, self.rows_written = next_frame, rows_written
+        self.csv_bytes, self.context = csv_bytes, context
+
+    def _save_checkpoint(self):
+        """Guarda el checkpoint de forma atómica (archivo temporal + reemplazo)."""
+        state = {
+            'next_frame': self.next_frame,
+            'rows_written': self.rows_written,
+            'csv_bytes': self.csv_bytes,
+            'context': self.context,
+            'source': self.source,
+        }
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def write_chunk(self, chunk, next_frame):
+        """
+        Calcula la cinemática de un bloque de puntos y lo agrega al CSV.
+
+        Args:
+        chunk (list): Puntos detectados [{'frame', 'x', 'y', 'time'}, ...].
+        next_frame (int): Primer frame aún no procesado (posición para reanudar).
+        """
+        if chunk:
+            samples = self.context + chunk
+            df = calculate_kinematics(samples, verbose=False)
+            df = df.iloc[len(self.context):]  # Quitar las muestras de contexto
+
+            write_header = self.rows_written == 0
+            with open(self.csv_path, 'a', newline='', encoding='utf-8') as f:
+                df.to_csv(f, index=False, header=write_header, float_format='%.5f')
+                f.flush()
+                os.fsync(f.fileno())
+                self.csv_bytes = f.tell()
+
+            self.rows_written += len(df)
+            self.context = [dict(s) for s in samples[-CONTEXT_SAMPLES:]]
+
+        self.next_frame = next_frame
+        self._save_checkpoint()
+
+    def finalize(self):
+        """Elimina el checkpoint una vez terminado el procesamiento completo."""
+        if os.path.exists(self.checkpoint_path): os.remove(self.checkpoint_path)
+        print(f"Streaming completado: {self.rows_written} filas guardadas en {self.csv_path}")
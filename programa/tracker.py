@@ -10,22 +10,40 @@ import os
 
 # Importar configuración
 from programa.config import (GAUSSIAN_BLUR_KERNEL_SIZE, MORPH_ITERATIONS, DISPLAY_SIZE,
-    FONT, FONT_SCALE, FONT_COLOR_INFO, FONT_COLOR_DETECTED,
-    FONT_COLOR_NOT_DETECTED, FONT_THICKNESS, CIRCLE_COLOR, CIRCLE_THICKNESS,
     OUTPUT_VIDEO_CODEC, OUTPUT_VIDEO_EXTENSION,
+    EXPORT_SCALE, EXPORT_FRAME_STRIDE, EXPORT_DETECTION_MARGIN,
     # Parámetros Blob Detector
     FILTER_BY_COLOR, BLOB_COLOR, LOWER_HSV, UPPER_HSV,
     FILTER_BY_AREA, MIN_AREA, MAX_AREA,
     FILTER_BY_CIRCULARITY, MIN_CIRCULARITY, MAX_CIRCULARITY,
     FILTER_BY_CONVEXITY, MIN_CONVEXITY, MAX_CONVEXITY,
-    FILTER_BY_INERTIA, MIN_INERTIA_RATIO, MAX_INERTIA_RATIO)
+    FILTER_BY_INERTIA, MIN_INERTIA_RATIO, MAX_INERTIA_RATIO,
+    PREVIEW_WINDOW_NAME, DETECTOR_BACKEND, DETECTOR_BACKENDS)
+from programa.preview import AsyncPreview, can_run_async_preview
+from programa.export import VideoExporter, AnnotationWriter, draw_tracking_overlay
+
+def keypoint_to_detection(keypoint):
+    """Convierte un cv2.KeyPoint en una tupla (x, y, size), o None si no hay keypoint."""
+    if keypoint is None: return None
+    return (keypoint.pt[0], keypoint.pt[1], keypoint.size)
+
 
 class BallTracker:
     """
     Clase para rastrear una pelota usando SimpleBlobDetector de OpenCV.
     """
-    def __init__(self):
-        """Inicializa el tracker y configura el SimpleBlobDetector."""
+    def __init__(self, detector_backend=DETECTOR_BACKEND):
+        """
+        Inicializa el tracker y configura el SimpleBlobDetector.
+
+        Args:
+        detector_backend (str): 'blob' (SimpleBlobDetector) o 'contour' (contorno de
+                                mayor área sobre la misma máscara).
+        """
+        if detector_backend not in DETECTOR_BACKENDS:
+            raise ValueError(f"Detector desconocido '{detector_backend}'. Opciones: {', '.join(DETECTOR_BACKENDS)}")
+        self.detector_backend = detector_backend
+
         # Parámetros de preprocesamiento
         self.blur_ksize = GAUSSIAN_BLUR_KERNEL_SIZE
         self.morph_iter = MORPH_ITERATIONS
@@ -39,6 +57,8 @@ class BallTracker:
         self.frame_width = 0
         self.frame_height = 0
         self.video_writer = None
+        self.points_detected = 0
+        self.stopped_early = False # True si el último track() terminó por la tecla 'q'
 
         # --- Configurar SimpleBlobDetector ---
         params = cv2.SimpleBlobDetector_Params()
@@ -86,6 +106,8 @@ class BallTracker:
         else :
             self.detector = cv2.SimpleBlobDetector_create(params)
 
+        if detector_backend == 'contour':
+            print("Detector por contornos inicializado (contorno de mayor área en la máscara).")
         print("SimpleBlobDetector inicializado con los siguientes filtros:")
         print(f"  Filter by Color: {params.filterByColor} (Blob Color: {params.blobColor if not FILTER_BY_COLOR else 'N/A - Using HSV Mask'})")
         print(f"  Filter by Area: {params.filterByArea} (Min: {params.minArea}, Max: {params.maxArea})")
@@ -108,18 +130,22 @@ class BallTracker:
         print(f"Video abierto: {video_path} | FPS: {self.fps:.2f} | Tamaño: {self.frame_width}x{self.frame_height}")
         return True
 
-    def _setup_video_writer(self, output_path):
-        """Configura el VideoWriter."""
+    def _setup_video_writer(self, output_path, codec=OUTPUT_VIDEO_CODEC, scale=EXPORT_SCALE,
+                            stride=EXPORT_FRAME_STRIDE, detection_margin=EXPORT_DETECTION_MARGIN):
+        """Configura el VideoExporter (escala, stride, codec y margen de detección)."""
         if not output_path or self.frame_width == 0 or self.frame_height == 0:
             self.video_writer = None; return
-        output_dir = os.path.dirname(output_path)
-        os.makedirs(output_dir, exist_ok=True)
-        fourcc = cv2.VideoWriter_fourcc(*OUTPUT_VIDEO_CODEC)
-        self.video_writer = cv2.VideoWriter(output_path, fourcc, self.fps, (self.frame_width, self.frame_height))
-        if self.video_writer.isOpened():
-            print(f"Video de salida configurado en: {output_path}")
-        else:
-            print(f"Error: No se pudo abrir VideoWriter para: {output_path}")
+        self.video_writer = VideoExporter(output_path, self.fps, (self.frame_width, self.frame_height),
+                                          codec=codec, scale=scale, stride=stride,
+                                          detection_margin=detection_margin)
+        if not self.video_writer.is_open():
+            self.video_writer = None
+
+    def release(self):
+        """Cierra el video de entrada y el de salida si quedaron abiertos."""
+        if self.cap is not None: self.cap.release()
+        if self.video_writer is not None:
+            self.video_writer.release()
             self.video_writer = None
 
     def _preprocess_and_detect(self, frame):
@@ -157,6 +183,9 @@ class BallTracker:
                  image_to_detect_on = gray
             self.current_mask = None # No hay máscara explícita
 
+        if self.detector_backend == 'contour':
+            return self._detect_largest_contour(image_to_detect_on)
+
         # Detectar blobs
         keypoints = self.detector.detect(image_to_detect_on)
 
@@ -170,35 +199,54 @@ class BallTracker:
 
         return best_keypoint # Retorna el KeyPoint o None
 
-    def _draw_visualization(self, frame_to_draw, frame_number, timestamp, keypoint):
-        """Dibuja la información de tracking (keypoint y texto) en el frame."""
-        position = None
-        radius = 0 # Aproximado
-
-        if keypoint is not None:
-            # Extraer posición (x, y) y tamaño (diámetro/2) del keypoint
-            x = int(keypoint.pt[0])
-            y = int(keypoint.pt[1])
-            radius = int(keypoint.size / 2)
-            position = (x, y)
-
-            # Dibujar el keypoint detectado (OpenCV dibuja un círculo con cruz)
-            # frame_to_draw = cv2.drawKeypoints(frame_to_draw, [keypoint], np.array([]), (0,0,255), cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS)
-            # O dibujar nuestro propio círculo
-            cv2.circle(frame_to_draw, position, radius, CIRCLE_COLOR, CIRCLE_THICKNESS)
-
-            cv2.putText(frame_to_draw, f"Pos (px): ({x}, {y}) Sz: {keypoint.size:.1f}", (10, 50), FONT, FONT_SCALE, FONT_COLOR_DETECTED, FONT_THICKNESS)
+    def _detect_largest_contour(self, image):
+        """
+        Detector alternativo: toma el contorno externo de mayor área (dentro del rango
+        de área configurado) y retorna su centroide como cv2.KeyPoint.
+        """
+        if FILTER_BY_COLOR:
+            binary = image # La máscara HSV ya es binaria
         else:
-            cv2.putText(frame_to_draw, "Pelota no detectada", (10, 50), FONT, FONT_SCALE, FONT_COLOR_NOT_DETECTED, FONT_THICKNESS)
+            _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        best_contour, best_area = None, 0
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if FILTER_BY_AREA and not (MIN_AREA <= area <= MAX_AREA): continue
+            if area > best_area:
+                best_contour, best_area = contour, area
+
+        if best_contour is None: return None
+        moments = cv2.moments(best_contour)
+        if moments['m00'] == 0: return None
+        # Diámetro del círculo de área equivalente (como KeyPoint.size del blob detector)
+        size = 2 * np.sqrt(best_area / np.pi)
+        return cv2.KeyPoint(float(moments['m10'] / moments['m00']), float(moments['m01'] / moments['m00']), float(size))
+
+    def detect_frame(self, frame):
+        """
+        Detecta la pelota en un frame suelto (sin abrir ningún video).
 
-        cv2.putText(frame_to_draw, f"Frame: {frame_number} Time: {timestamp:.2f}s FPS: {self.fps:.1f}", (10, 30), FONT, FONT_SCALE, FONT_COLOR_INFO, FONT_THICKNESS)
+        Returns:
+        tuple: (x, y, size) en píxeles, o None si no se detectó.
+        """
+        return keypoint_to_detection(self._preprocess_and_detect(frame))
+
+    def _draw_visualization(self, frame_to_draw, frame_number, timestamp, keypoint):
+        """Dibuja la información de tracking (keypoint y texto) en el frame (in-place)."""
+        return draw_tracking_overlay(frame_to_draw, frame_number, timestamp, self.fps,
+                                     keypoint_to_detection(keypoint))
 
-        # Preparar frame para mostrar en pantalla
-        display_frame = frame_to_draw
+    def _build_display_frame(self, display_frame, mask):
+        """
+        Prepara el frame anotado para mostrar en pantalla (redimensiona y, si hay
+        máscara, la combina al lado). Sólo se usa cuando la ventana está visible.
+        """
         # Opcional: Mostrar la máscara si se usó
         display_combined = display_frame
-        if self.current_mask is not None and self.display_size:
-             mask_colored = cv2.cvtColor(self.current_mask, cv2.COLOR_GRAY2BGR)
+        if mask is not None and self.display_size:
+             mask_colored = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
              # Redimensionar ambos para combinar
              if len(self.display_size) == 2 and self.display_size[0] > 0 and self.display_size[1] > 0:
                   try:
@@ -227,21 +275,17 @@ class BallTracker:
 
         return display_combined # Retorna el frame listo para mostrar
 
-    def track(self, video_path, output_video_path=None, show_video=True):
-        """
-        Procesa el video, rastrea la pelota usando SimpleBlobDetector, guarda video
-        y retorna datos.
+    def _process_frames(self, frame_number, show_video, preview, annotation_writer,
+                        chunk_size, on_chunk, flush_interval):
         """
-        if not self._setup_video_capture(video_path): return None
-
-        if output_video_path:
-            base, _ = os.path.splitext(output_video_path)
-            output_video_path_corrected = base + OUTPUT_VIDEO_EXTENSION
-            self._setup_video_writer(output_video_path_corrected)
-        else: self.video_writer = None
+        Bucle principal de track(): lee, detecta, exporta y (opcionalmente) muestra
+        cada frame hasta el final del video o hasta que se pida salir.
 
+        Returns:
+        tuple: (puntos aún no entregados a on_chunk, siguiente frame a procesar).
+        """
         tracking_data = []
-        frame_number = 0
+        last_flush = time.perf_counter()
 
         while True:
             ret, frame = self.cap.read()
@@ -252,11 +296,21 @@ class BallTracker:
             # Preprocesar y detectar el blob (pelota)
             best_keypoint = self._preprocess_and_detect(frame)
 
-            # Crear copia para dibujar
-            frame_to_draw_on = frame.copy()
+            detection = keypoint_to_detection(best_keypoint)
+
+            # Sólo se copia y anota el frame para la ventana si se va a mostrar
+            # (el video de salida anota por su cuenta sólo los frames que escribe)
+            if preview is not None:
+                needs_annotation = preview.wants_frame()
+            else:
+                needs_annotation = show_video
 
-            # Dibujar visualización
-            display_output_frame = self._draw_visualization(frame_to_draw_on, frame_number, timestamp, best_keypoint)
+            frame_to_draw_on = None
+            if needs_annotation:
+                # Crear copia para dibujar
+                frame_to_draw_on = frame.copy()
+                # Dibujar visualización
+                self._draw_visualization(frame_to_draw_on, frame_number, timestamp, best_keypoint)
 
             # Guardar datos si se detectó
             if best_keypoint is not None:
@@ -266,25 +320,121 @@ class BallTracker:
                     'y': int(best_keypoint.pt[1]),
                     'time': timestamp
                 })
+                self.points_detected += 1
 
-            # Escribir video de salida
-            if self.video_writer is not None and self.video_writer.isOpened():
-                # Escribir el frame CON las anotaciones
-                self.video_writer.write(frame_to_draw_on)
+            # Escribir video de salida (el exporter decide si el frame se escribe)
+            if self.video_writer is not None:
+                self.video_writer.submit(frame, frame_number, timestamp, detection)
+            if annotation_writer is not None and detection is not None:
+                annotation_writer.write(frame_number, timestamp, detection)
 
             # Mostrar ventana
-            if show_video:
-                cv2.imshow("Tracking (Blob Detector) - Pelota ('q' para salir)", display_output_frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'): break
+            stop_requested = False
+            if preview is not None:
+                # No bloquea: la ventana (en el hilo principal) toma el último frame
+                if frame_to_draw_on is not None:
+                    preview.submit(frame_to_draw_on, self.current_mask)
+                stop_requested = preview.quit_requested()
+            elif show_video:
+                display_output_frame = self._build_display_frame(frame_to_draw_on, self.current_mask)
+                cv2.imshow(PREVIEW_WINDOW_NAME, display_output_frame)
+                stop_requested = cv2.waitKey(1) & 0xFF == ord('q')
 
             frame_number += 1
 
-        # --- Limpieza ---
-        self.cap.release()
-        if self.video_writer is not None: self.video_writer.release()
-        if show_video: cv2.destroyAllWindows()
+            # Modo streaming: entregar el bloque (lleno o por tiempo) y liberar memoria
+            if on_chunk is not None:
+                chunk_full = chunk_size and len(tracking_data) >= chunk_size
+                flush_due = flush_interval and time.perf_counter() - last_flush >= flush_interval
+                if chunk_full or flush_due:
+                    on_chunk(tracking_data, frame_number)
+                    tracking_data = []
+                    last_flush = time.perf_counter()
+
+            if stop_requested:
+                self.stopped_early = True
+                break
+
+        return tracking_data, frame_number
+
+    def track(self, video_path, output_video_path=None, show_video=True,
+              start_frame=0, chunk_size=None, on_chunk=None, flush_interval=None, preview_hz=None,
+              video_codec=OUTPUT_VIDEO_CODEC, export_scale=EXPORT_SCALE,
+              export_stride=EXPORT_FRAME_STRIDE, export_margin=EXPORT_DETECTION_MARGIN,
+              annotations_path=None):
+        """
+        Procesa el video, rastrea la pelota usando SimpleBlobDetector, guarda video
+        y retorna datos.
+
+        Vista previa asíncrona: si `preview_hz` es mayor que cero, la ventana se
+        actualiza a esa frecuencia mostrando el último frame anotado, y el tracking
+        no espera al display. La ventana se atiende en el hilo principal y el
+        tracking corre en un hilo de trabajo; si track() no se llama desde el hilo
+        principal se usa la ventana síncrona.
+
+        Exportación: `video_codec`, `export_scale`, `export_stride` y `export_margin`
+        configuran el video de salida (ver VideoExporter). Si se pasa
+        `annotations_path`, las detecciones se guardan en ese CSV para renderizar el
+        video después (export.render_annotated_video) sin codificar durante el tracking.
+
+        Modo streaming: si se pasa `on_chunk`, cada `chunk_size` puntos detectados se
+        llama a `on_chunk(chunk, next_frame)` y el bloque se descarta de memoria, de
+        modo que el uso de memoria no crece con la duración del video. En ese caso la
+        lista retornada sólo contiene los puntos no entregados (normalmente vacía);
+        `self.points_detected` tiene el total. `start_frame` permite reanudar.
+        Si pasan `flush_interval` segundos sin completar un bloque, se entrega igual
+        (aunque esté vacío) para que la posición guardada siga avanzando en tramos
+        largos sin detecciones. Si el usuario corta con 'q', `self.stopped_early` queda
+        en True: el video no se procesó completo y el checkpoint debe conservarse.
+        """
+        if not self._setup_video_capture(video_path): return None
+
+        if output_video_path:
+            base, _ = os.path.splitext(output_video_path)
+            output_video_path_corrected = base + OUTPUT_VIDEO_EXTENSION
+            self._setup_video_writer(output_video_path_corrected, codec=video_codec,
+                                     scale=export_scale, stride=export_stride,
+                                     detection_margin=export_margin)
+        else: self.video_writer = None
+
+        annotation_writer = AnnotationWriter(annotations_path) if annotations_path else None
 
-        if not tracking_data: print("Advertencia: No se detectó la pelota en ningún frame usando Blob Detector.")
-        else: print(f"Tracking (Blob Detector) completado. Se registraron {len(tracking_data)} puntos.")
+        frame_number = 0
+        self.points_detected = 0
+        self.stopped_early = False
+
+        if start_frame > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+            frame_number = start_frame
+            print(f"Procesamiento reanudado desde el frame {start_frame}.")
+
+        preview = None
+        if show_video and preview_hz:
+            if can_run_async_preview():
+                preview = AsyncPreview(PREVIEW_WINDOW_NAME, self._build_display_frame, refresh_hz=preview_hz)
+            else:
+                print("Advertencia: La vista previa asíncrona necesita el hilo principal. Se usa la ventana síncrona.")
+
+        loop_args = (frame_number, show_video, preview, annotation_writer,
+                     chunk_size, on_chunk, flush_interval)
+        try:
+            if preview is not None:
+                # La ventana corre en este hilo (el principal) y el tracking en uno de trabajo
+                tracking_data, frame_number = preview.run_while(self._process_frames, *loop_args)
+            else:
+                tracking_data, frame_number = self._process_frames(*loop_args)
+        finally:
+            # --- Limpieza ---
+            self.release()
+            if annotation_writer is not None: annotation_writer.close()
+            if show_video and preview is None: cv2.destroyAllWindows()
+
+        # Modo streaming: entregar el último bloque (aunque esté vacío, para guardar la posición)
+        if on_chunk is not None:
+            on_chunk(tracking_data, frame_number)
+            tracking_data = []
+
+        if not self.points_detected: print("Advertencia: No se detectó la pelota en ningún frame usando Blob Detector.")
+        else: print(f"Tracking (Blob Detector) completado. Se registraron {self.points_detected} puntos.")
 
         return tracking_data
\ No newline at end of file
@@ -0,0 +1,97 @@
+# regression_harness.py
+"""
+Compara combinaciones de detector y estimador de derivadas sobre los clips de
+referencia (carpeta REGRESSION_CORPUS_FOLDER de config.py) contra su trayectoria
+real, y falla (código de salida 1) si la precisión empeora más allá de las
+tolerancias configuradas. La velocidad (FPS) depende de la máquina, por eso sólo
+se controla con --check_fps.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+from programa.analysis import DERIVATIVE_ESTIMATORS
+from programa.regression import (list_corpus, find_reference_clips, run_matrix, check_results,
+    load_baseline, save_baseline, bootstrap_ground_truth)
+from programa.config import (DETECTOR_BACKENDS, REGRESSION_CORPUS_FOLDER, REGRESSION_CORPUS_MANIFEST,
+    REGRESSION_CACHE_FOLDER, REGRESSION_BASELINE_FILENAME, GROUND_TRUTH_FILENAME_SUFFIX)
+
+
+def _format_metric(value, width, decimals):
+    """Formatea una métrica; las que no tienen referencia (NaN) se muestran como '-'."""
+    return f"{'-':>{width}}" if math.isnan(value) else f"{value:>{width}.{decimals}f}"
+
+
+def print_results(results):
+    """Muestra los resultados en forma de tabla."""
+    print(f"\n{'Clip':<24} {'Detector':<9} {'Estimador':<9} {'Detección':>9} "
+          f"{'Pos RMSE':>9} {'Vel RMSE':>9} {'Acel RMSE':>10} {'FPS':>8}")
+    for r in results:
+        print(f"{r['clip'][:24]:<24} {r['detector']:<9} {r['estimator']:<9} {r['detection_rate']:>9.1%} "
+              f"{_format_metric(r['position_rmse'], 9, 2)} {_format_metric(r['velocity_rmse'], 9, 1)} "
+              f"{_format_metric(r['acceleration_rmse'], 10, 1)} "
+              f"{r['fps']:>8.1f}{'*' if r.get('cached') else ''}")
+    print("(Pos en px, Vel en px/s, Acel en px/s². FPS = frames procesados por segundo, sin decodificación. "
+          "'-' = el ground truth no trae esa referencia. * = detecciones del cache, FPS de la "
+          "ejecución que lo generó.)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pruebas de regresión de precisión y velocidad del tracking.')
+    parser.add_argument('--corpus', type=str, default=REGRESSION_CORPUS_FOLDER,
+                        help=f'Carpeta con los clips (o su manifiesto {REGRESSION_CORPUS_MANIFEST}) y '
+                             f'sus ground truth (por defecto: {REGRESSION_CORPUS_FOLDER}).')
+    parser.add_argument('--detectors', nargs='+', default=list(DETECTOR_BACKENDS), choices=DETECTOR_BACKENDS,
+                        help='Detectores a evaluar (por defecto: todos).')
+    parser.add_argument('--estimators', nargs='+', default=list(DERIVATIVE_ESTIMATORS),
+                        choices=list(DERIVATIVE_ESTIMATORS),
+                        help='Estimadores de derivadas a evaluar (por defecto: todos).')
+    parser.add_argument('--cache', type=str, default=REGRESSION_CACHE_FOLDER,
+                        help=f'Carpeta del cache de detecciones (por defecto: {REGRESSION_CACHE_FOLDER}).')
+    parser.add_argument('--save_baseline', action='store_true',
+                        help='Guardar los resultados como nuevo baseline en la carpeta del corpus.')
+    parser.add_argument('--check_fps', action='store_true',
+                        help='Controlar también la velocidad (FPS) contra el baseline. Sólo tiene '
+                             'sentido en la máquina donde se guardó el baseline.')
+    parser.add_argument('--bootstrap', action='store_true',
+                        help=f'Crear "{GROUND_TRUTH_FILENAME_SUFFIX}" para los clips que no lo tienen, '
+                             'a partir del detector blob actual (revisar a mano antes de usarlo).')
+    args = parser.parse_args()
+
+    start_time = time.time()
+
+    if args.bootstrap:
+        for video_path, gt_path in list_corpus(args.corpus):
+            if not os.path.exists(gt_path):
+                bootstrap_ground_truth(video_path, gt_path, args.cache)
+
+    clips = find_reference_clips(args.corpus)
+    if not clips:
+        print(f"Error: No hay clips con ground truth en '{args.corpus}'.")
+        sys.exit(1)
+
+    print(f"--- Evaluando {len(clips)} clip(s) x {len(args.detectors)} detector(es) x "
+          f"{len(args.estimators)} estimador(es) ---")
+    # Para medir la velocidad hay que volver a detectar: el cache no sirve
+    results = run_matrix(clips, args.detectors, args.estimators, args.cache, use_cache=not args.check_fps)
+    print_results(results)
+
+    baseline_path = os.path.join(args.corpus, REGRESSION_BASELINE_FILENAME)
+    if args.save_baseline:
+        save_baseline(results, baseline_path)
+
+    failures = check_results(results, load_baseline(baseline_path), check_fps=args.check_fps)
+
+    print(f"\nEvaluación completada en {time.time() - start_time:.2f} segundos.")
+    if failures:
+        print(f"\nREGRESIONES ({len(failures)}):")
+        for failure in failures:
+            print(f"- {failure}")
+        sys.exit(1)
+    print("Sin regresiones.")
+
+
+if __name__ == "__main__":
+    main()
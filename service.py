@@ -0,0 +1,91 @@
+# service.py
+"""
+Servicio residente de tracking: mantiene los detectores inicializados y procesa
+trabajos (video + configuración) sin relanzar el programa para cada clip.
+
+Uso:
+    python service.py serve                      # Atiende trabajos por socket local
+    python service.py serve --watch              # Vigila la carpeta de trabajos
+    python service.py submit video.mp4 --overrides '{"estimator": "central"}'
+"""
+import argparse
+import json
+import sys
+
+# programa.config y programa.service (OpenCV, NumPy, pandas, matplotlib) se importan
+# sólo al iniciar el servicio, para que enviar un trabajo sea rápido.
+from programa.client import submit_job
+from programa.service_config import (SERVICE_HOST, SERVICE_PORT, SERVICE_MAX_CONCURRENT_JOBS,
+    SERVICE_JOBS_FOLDER, SERVICE_POLL_INTERVAL, JOB_OPTIONS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servicio residente de tracking con cola de trabajos.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve = subparsers.add_parser('serve', help='Iniciar el servicio.')
+    serve.add_argument('--host', type=str, default=SERVICE_HOST,
+                       help=f'Dirección donde escuchar (por defecto: {SERVICE_HOST}).')
+    serve.add_argument('--port', type=int, default=SERVICE_PORT,
+                       help=f'Puerto donde escuchar (por defecto: {SERVICE_PORT}).')
+    serve.add_argument('--workers', type=int, default=SERVICE_MAX_CONCURRENT_JOBS,
+                       help=f'Trabajos procesados en paralelo (por defecto: {SERVICE_MAX_CONCURRENT_JOBS}).')
+    serve.add_argument('--warm', nargs='+', default=None,
+                       help='Detectores a inicializar al arrancar (por defecto: el de config.py).')
+    serve.add_argument('--watch', action='store_true',
+                       help='En lugar del socket, vigilar la carpeta de trabajos (archivos .json).')
+    serve.add_argument('--jobs_folder', type=str, default=SERVICE_JOBS_FOLDER,
+                       help=f'Carpeta de trabajos para --watch (por defecto: {SERVICE_JOBS_FOLDER}).')
+
+    submit = subparsers.add_parser('submit', help='Enviar un video al servicio y esperar el resultado.')
+    submit.add_argument('video', type=str, help='Ruta del video a analizar.')
+    submit.add_argument('--overrides', type=str, default='{}',
+                        help=f'Opciones del trabajo en JSON. Claves válidas: {", ".join(JOB_OPTIONS)}.')
+    submit.add_argument('--host', type=str, default=SERVICE_HOST,
+                        help=f'Dirección del servicio (por defecto: {SERVICE_HOST}).')
+    submit.add_argument('--port', type=int, default=SERVICE_PORT,
+                        help=f'Puerto del servicio (por defecto: {SERVICE_PORT}).')
+
+    args = parser.parse_args()
+
+    if args.command == 'submit':
+        try:
+            overrides = json.loads(args.overrides)
+        except ValueError as e:
+            print(f"Error: --overrides no es un JSON válido: {e}")
+            sys.exit(1)
+        try:
+            response = submit_job(args.video, overrides, host=args.host, port=args.port)
+        except OSError as e:
+            print(f"Error: No se pudo conectar con el servicio en {args.host}:{args.port}: {e}")
+            sys.exit(1)
+        print(json.dumps(response, indent=2))
+        sys.exit(0 if response.get('status') == 'ok' else 1)
+
+    if args.workers <= 0:
+        print("Error: --workers debe ser mayor que cero.")
+        sys.exit(1)
+
+    from programa.config import DETECTOR_BACKEND, DETECTOR_BACKENDS
+    from programa.service import TrackingService, serve_socket, watch_folder
+
+    args.warm = args.warm or [DETECTOR_BACKEND]
+    unknown = [backend for backend in args.warm if backend not in DETECTOR_BACKENDS]
+    if unknown:
+        print(f"Error: Detector desconocido en --warm: {', '.join(unknown)}. Opciones: {', '.join(DETECTOR_BACKENDS)}")
+        sys.exit(1)
+
+    service = TrackingService(max_workers=args.workers)
+    print(f"--- Inicializando detectores: {', '.join(args.warm)} ---")
+    service.warm_up(args.warm)
+    try:
+        if args.watch:
+            watch_folder(service, args.jobs_folder, poll_interval=SERVICE_POLL_INTERVAL)
+        else:
+            serve_socket(service, host=args.host, port=args.port)
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
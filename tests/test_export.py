@@ -0,0 +1,69 @@
+# test_export.py
+"""
+La exportación en vivo (VideoExporter.submit) y la diferida (render_annotated_video)
+deben escribir exactamente los mismos frames para cualquier stride y margen.
+"""
+import cv2
+import numpy as np
+import pytest
+
+from programa.export import VideoExporter, AnnotationWriter, render_annotated_video
+
+FRAME_SIZE = (32, 24)
+TOTAL_FRAMES = 30
+
+
+@pytest.fixture
+def written_frames(monkeypatch):
+    """Registra los números de frame escritos en lugar de codificarlos."""
+    written = []
+    monkeypatch.setattr(VideoExporter, 'write',
+                        lambda self, frame, frame_number, timestamp, detection: written.append(frame_number))
+    return written
+
+
+def _make_video(path):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 30, FRAME_SIZE)
+    for _ in range(TOTAL_FRAMES):
+        writer.write(np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8))
+    writer.release()
+
+
+def _live_frames(tmp_path, written, detected, stride, margin):
+    exporter = VideoExporter(str(tmp_path / 'live.avi'), 30, FRAME_SIZE, codec='MJPG',
+                             stride=stride, detection_margin=margin)
+    frame = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+    for frame_number in range(TOTAL_FRAMES):
+        detection = (10.0, 10.0, 5.0) if frame_number in detected else None
+        exporter.submit(frame, frame_number, frame_number / 30, detection)
+    exporter.release()
+    selected = list(written)
+    written.clear()
+    return selected
+
+
+def _deferred_frames(tmp_path, written, detected, stride, margin):
+    video_path = tmp_path / 'input.avi'
+    _make_video(video_path)
+    annotations = AnnotationWriter(str(tmp_path / 'annotations.csv'))
+    for frame_number in sorted(detected):
+        annotations.write(frame_number, frame_number / 30, (10.0, 10.0, 5.0))
+    annotations.close()
+    render_annotated_video(str(video_path), str(tmp_path / 'annotations.csv'), str(tmp_path / 'deferred.avi'),
+                           codec='MJPG', stride=stride, detection_margin=margin)
+    selected = list(written)
+    written.clear()
+    return selected
+
+
+def test_detection_on_non_stride_frame(tmp_path, written_frames):
+    assert _live_frames(tmp_path, written_frames, {9}, stride=2, margin=3) == [6, 8, 10, 12]
+
+
+@pytest.mark.parametrize('detected', [{9}, {0}, {4, 5}, {3, 11, 12, 27}, {29}, set()])
+@pytest.mark.parametrize('stride, margin', [(1, None), (2, None), (3, None),
+                                            (1, 2), (2, 3), (3, 1), (3, 4), (4, 10)])
+def test_live_matches_deferred(tmp_path, written_frames, detected, stride, margin):
+    live = _live_frames(tmp_path, written_frames, detected, stride, margin)
+    deferred = _deferred_frames(tmp_path, written_frames, detected, stride, margin)
+    assert live == deferred
@@ -0,0 +1,126 @@
+# test_regression.py
+"""
+Métricas y controles del arnés de regresión, con trayectorias sintéticas.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from programa import config, regression
+from programa.regression import (detect_clip, compare_to_ground_truth, check_results, load_ground_truth,
+    result_key, list_corpus, find_reference_clips, ERROR_LIMITS)
+from programa.config import REGRESSION_ERROR_TOLERANCE
+
+FPS = 30.0
+
+
+def _ground_truth(frames=20):
+    """Caída libre sintética: x constante, y = y0 + v0 t + a t² / 2."""
+    t = np.arange(frames) / FPS
+    return pd.DataFrame({'frame': np.arange(frames), 'time': t,
+                         'x': 500.0, 'y': 100 + 200 * t + 1500 * t ** 2,
+                         'vx': 0.0, 'vy': 200 + 3000 * t, 'ax': 0.0, 'ay': 3000.0})
+
+
+def _result(**metrics):
+    result = {'clip': 'clip.mp4', 'detector': 'blob', 'estimator': 'central', 'fps': 100.0,
+              'detection_rate': 1.0, 'position_rmse': 1.0, 'velocity_rmse': 10.0,
+              'acceleration_rmse': 100.0}
+    result.update(metrics)
+    return result
+
+
+def test_compare_exact_trajectory_has_zero_error():
+    gt = _ground_truth()
+    metrics = compare_to_ground_truth(gt.copy(), gt)
+    assert metrics['detection_rate'] == 1.0
+    for metric in ERROR_LIMITS:
+        assert metrics[metric] == 0.0
+
+
+def test_compare_offset_and_missing_frames():
+    gt = _ground_truth()
+    estimated = gt.copy()
+    estimated['x'] += 3.0
+    estimated['y'] += 4.0
+    estimated = estimated[estimated['frame'] % 4 != 0] # Se pierde 1 de cada 4 frames
+    metrics = compare_to_ground_truth(estimated, gt)
+    assert metrics['detection_rate'] == 0.75
+    assert np.isclose(metrics['position_rmse'], 5.0)
+    assert metrics['velocity_rmse'] == 0.0
+
+
+def test_ground_truth_without_derivatives_compares_only_position(tmp_path):
+    gt = _ground_truth()
+    gt_path = tmp_path / 'clip_ground_truth.csv'
+    gt[['frame', 'x', 'y']].to_csv(gt_path, index=False)
+    loaded = load_ground_truth(str(gt_path), FPS)
+    assert loaded[['vx', 'vy', 'ax', 'ay']].isna().all().all()
+
+    metrics = compare_to_ground_truth(gt, loaded)
+    assert np.isclose(metrics['position_rmse'], 0.0)
+    assert np.isnan(metrics['velocity_rmse']) and np.isnan(metrics['acceleration_rmse'])
+    assert check_results([_result(velocity_rmse=float('nan'), acceleration_rmse=float('nan'))],
+                         {}) == []
+
+
+def test_check_results_against_baseline():
+    baseline = {result_key(_result()): {k: v for k, v in _result().items()
+                                        if k not in ('clip', 'detector', 'estimator')}}
+    assert check_results([_result()], baseline) == []
+    # Dentro de la tolerancia relativa
+    assert check_results([_result(velocity_rmse=10.0 * (1 + REGRESSION_ERROR_TOLERANCE / 2))], baseline) == []
+
+    failures = check_results([_result(velocity_rmse=10.0 * (1 + 2 * REGRESSION_ERROR_TOLERANCE))], baseline)
+    assert len(failures) == 1 and 'velocity_rmse' in failures[0]
+
+    # Los FPS dependen de la máquina: sólo se controlan si se pide
+    assert check_results([_result(fps=10.0)], baseline) == []
+    failures = check_results([_result(fps=10.0)], baseline, check_fps=True)
+    assert len(failures) == 1 and 'FPS' in failures[0]
+
+
+def test_check_results_absolute_limits():
+    failures = check_results([_result(position_rmse=float('nan'), detection_rate=0.0)], {})
+    assert any('en común' in f for f in failures)
+    assert any('tasa de detección' in f for f in failures)
+
+
+def test_corpus_manifest_points_to_clips_elsewhere(tmp_path):
+    corpus, clips = tmp_path / 'referencia', tmp_path / 'entrada'
+    corpus.mkdir()
+    clips.mkdir()
+    (clips / 'tiro.mp4').write_bytes(b'')
+    (corpus / 'local.mp4').write_bytes(b'')
+    (corpus / 'tiro_ground_truth.csv').write_text('frame,x,y\n', encoding='utf-8')
+    (corpus / 'corpus.json').write_text(json.dumps([{'video': '../entrada/tiro.mp4'},
+                                                    {'video': '../entrada/no_existe.mp4'}]),
+                                        encoding='utf-8')
+
+    listed = [(os.path.relpath(v, tmp_path), os.path.relpath(g, tmp_path)) for v, g in list_corpus(str(corpus))]
+    assert listed == [(os.path.join('referencia', 'local.mp4'), os.path.join('referencia', 'local_ground_truth.csv')),
+                      (os.path.join('entrada', 'tiro.mp4'), os.path.join('referencia', 'tiro_ground_truth.csv'))]
+    # Sólo los clips con ground truth entran en la evaluación
+    assert [os.path.basename(v) for v, _ in find_reference_clips(str(corpus))] == ['tiro.mp4']
+
+
+def test_detections_are_cached_per_detector_configuration(tmp_path, monkeypatch):
+    video = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'video', 'entrada', 'PeloAz.mp4')
+    first = detect_clip(video, 'blob', str(tmp_path))
+    assert not first['cached'] and first['tracking_data']
+
+    calls = []
+    monkeypatch.setattr(regression, 'run_detector', lambda *args: calls.append(args) or ([], 30.0, 1.0))
+    second = detect_clip(video, 'blob', str(tmp_path))
+    assert second['cached'] and second['tracking_data'] == first['tracking_data']
+    assert calls == []
+
+    # Otro detector, otra configuración o pedir no usar el cache: se vuelve a detectar
+    detect_clip(video, 'contour', str(tmp_path))
+    monkeypatch.setattr(config, 'MIN_AREA', config.MIN_AREA + 1)
+    detect_clip(video, 'blob', str(tmp_path))
+    detect_clip(video, 'blob', str(tmp_path), use_cache=False)
+    assert len(calls) == 3
@@ -0,0 +1,98 @@
+# test_service.py
+"""
+Configuración de trabajos del servicio y cliente liviano.
+"""
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from programa.service import JOB_DEFAULTS, TrackingService, resolve_job_config
+from programa.service_config import JOB_OPTIONS
+
+
+def test_every_job_option_has_a_default():
+    assert set(JOB_DEFAULTS) == set(JOB_OPTIONS)
+
+
+def test_client_does_not_import_opencv_or_numpy():
+    code = "import sys, programa.client; print(' '.join(m for m in ('cv2', 'numpy') if m in sys.modules))"
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    loaded = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=repo_root)
+    assert loaded.stdout.strip() == ''
+
+
+@pytest.mark.parametrize('overrides', [
+    {'export_stride': 'x'}, {'export_stride': 0}, {'export_stride': 1.5}, {'export_stride': True},
+    {'export_scale': 0}, {'export_scale': '0.5'}, {'export_margin': -1}, {'export_margin': 2.0},
+    {'save_video': 'yes'}, {'save_csv': 1}, {'codec': 'h264x'}, {'codec': 7},
+    {'output_folder': ''}, {'output_suffix': None}, {'detector': 'hough'}, {'estimator': 'spline'},
+    {'unknown_option': 1}, ['export_stride'],
+])
+def test_resolve_job_config_rejects_invalid_overrides(overrides):
+    with pytest.raises(ValueError):
+        resolve_job_config(overrides)
+
+
+def test_resolve_job_config_accepts_valid_overrides():
+    config = resolve_job_config({'export_scale': 1, 'export_stride': 2, 'export_margin': 0,
+                                 'save_video': True, 'codec': 'MJPG', 'estimator': 'central'})
+    assert config['export_stride'] == 2 and config['save_video'] is True
+    assert resolve_job_config(None) == JOB_DEFAULTS
+
+
+class _FakeTracker:
+    def __init__(self, detector_backend):
+        self.detector_backend = detector_backend
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr('programa.service.BallTracker', _FakeTracker)
+    service = TrackingService(max_workers=2)
+    yield service
+    service.shutdown()
+
+
+def test_failed_job_releases_tracker_videos(service, monkeypatch, tmp_path):
+    def failing_job(tracker, video_path, config):
+        raise RuntimeError("falla a mitad del tracking")
+    monkeypatch.setattr('programa.service.process_job', failing_job)
+    video = tmp_path / 'clip.mp4'
+    video.write_bytes(b'')
+
+    response = service.submit({'video': str(video), 'overrides': {'output_folder': str(tmp_path)}}).result()
+    assert response['status'] == 'error'
+    tracker = service.pool.acquire('blob')
+    assert tracker.released # Volvió al conjunto, pero con los videos cerrados
+
+
+def test_concurrent_jobs_with_same_outputs_are_rejected(service, monkeypatch, tmp_path):
+    started, finish = threading.Event(), threading.Event()
+
+    def blocking_job(tracker, video_path, config):
+        started.set()
+        finish.wait(5)
+        return {'points': 0, 'timings': {}}
+    monkeypatch.setattr('programa.service.process_job', blocking_job)
+    for folder in ('a', 'b'):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / 'clip.mp4').write_bytes(b'')
+    job = {'video': str(tmp_path / 'a' / 'clip.mp4'), 'overrides': {'output_folder': str(tmp_path / 'out')}}
+
+    first = service.submit(job)
+    assert started.wait(5)
+    # Mismo nombre base y misma carpeta de salida, aunque el video esté en otra carpeta
+    second = service.submit({**job, 'video': str(tmp_path / 'b' / 'clip.mp4')}).result()
+    finish.set()
+    assert second['status'] == 'error' and 'Otro trabajo' in second['error']
+    assert first.result()['status'] == 'ok'
+    # Al terminar, la salida queda libre
+    assert service.submit(job).result()['status'] == 'ok'
@@ -0,0 +1,118 @@
+# test_streaming.py
+"""
+El modo streaming debe producir el mismo CSV que el cálculo completo, con
+cualquier tamaño de bloque y también al reanudar después de un corte.
+"""
+import os
+
+import cv2
+import pandas as pd
+import pytest
+
+from programa.analysis import calculate_kinematics
+from programa.streaming import StreamingResultsWriter, describe_source, read_csv_downsampled
+from programa.tracker import BallTracker
+
+VIDEO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                     'video', 'entrada', 'PeloAz.mp4')
+
+
+@pytest.fixture(scope='module')
+def full_run(tmp_path_factory):
+    """Puntos del video completo y CSV del cálculo sin bloques (como main.py)."""
+    tracking_data = BallTracker().track(VIDEO, show_video=False)
+    csv_path = tmp_path_factory.mktemp('full') / 'full.csv'
+    calculate_kinematics(tracking_data, verbose=False).to_csv(csv_path, index=False, float_format='%.5f')
+    return tracking_data, csv_path.read_bytes()
+
+
+def _writer(tmp_path, resume=False, detector='blob'):
+    return StreamingResultsWriter(str(tmp_path / 'stream.csv'), str(tmp_path / 'stream.json'),
+                                  resume=resume, source=describe_source(VIDEO, detector))
+
+
+@pytest.mark.parametrize('chunk_size', range(1, 101))
+def test_chunks_match_full_run(tmp_path, full_run, chunk_size):
+    tracking_data, expected = full_run
+    writer = _writer(tmp_path)
+    for start in range(0, len(tracking_data), chunk_size):
+        chunk = tracking_data[start:start + chunk_size]
+        writer.write_chunk(chunk, chunk[-1]['frame'] + 1)
+    writer.finalize()
+    assert (tmp_path / 'stream.csv').read_bytes() == expected
+    assert not (tmp_path / 'stream.json').exists()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 100])
+def test_tracker_streaming_matches_full_run(tmp_path, full_run, chunk_size):
+    writer = _writer(tmp_path)
+    BallTracker().track(VIDEO, show_video=False, chunk_size=chunk_size, on_chunk=writer.write_chunk)
+    assert (tmp_path / 'stream.csv').read_bytes() == full_run[1]
+
+
+def test_resume_after_crash_matches_full_run(tmp_path, full_run):
+    writer = _writer(tmp_path)
+    chunks = []
+
+    def crashing_chunk(chunk, next_frame):
+        writer.write_chunk(chunk, next_frame)
+        chunks.append(next_frame)
+        if len(chunks) == 3: raise RuntimeError("corte simulado")
+
+    with pytest.raises(RuntimeError):
+        BallTracker().track(VIDEO, show_video=False, chunk_size=4, on_chunk=crashing_chunk)
+    with open(tmp_path / 'stream.csv', 'a', encoding='utf-8') as f:
+        f.write('99,123,4') # Fila a medio escribir después del último checkpoint
+
+    writer = _writer(tmp_path, resume=True)
+    assert writer.next_frame == chunks[-1]
+    BallTracker().track(VIDEO, show_video=False, start_frame=writer.next_frame,
+                        chunk_size=4, on_chunk=writer.write_chunk)
+    assert (tmp_path / 'stream.csv').read_bytes() == full_run[1]
+
+
+def test_quit_keeps_checkpoint_for_resume(tmp_path, full_run, monkeypatch):
+    keys = iter([-1] * 20 + [ord('q')])
+    monkeypatch.setattr(cv2, 'imshow', lambda *args: None)
+    monkeypatch.setattr(cv2, 'waitKey', lambda delay: next(keys, -1))
+    monkeypatch.setattr(cv2, 'destroyAllWindows', lambda: None)
+
+    writer = _writer(tmp_path)
+    tracker = BallTracker()
+    tracker.track(VIDEO, show_video=True, chunk_size=3, on_chunk=writer.write_chunk)
+    assert tracker.stopped_early
+    assert (tmp_path / 'stream.json').exists()
+
+    writer = _writer(tmp_path, resume=True)
+    assert writer.next_frame == 21
+    tracker.track(VIDEO, show_video=False, start_frame=writer.next_frame,
+                  chunk_size=3, on_chunk=writer.write_chunk)
+    assert not tracker.stopped_early
+    assert (tmp_path / 'stream.csv').read_bytes() == full_run[1]
+
+
+def test_resume_without_checkpoint_keeps_csv(tmp_path):
+    (tmp_path / 'stream.csv').write_text('frame,x\n1,2\n', encoding='utf-8')
+    with pytest.raises(ValueError):
+        _writer(tmp_path, resume=True)
+    assert (tmp_path / 'stream.csv').read_text(encoding='utf-8') == 'frame,x\n1,2\n'
+
+
+def test_resume_with_other_detector_is_rejected(tmp_path, full_run):
+    writer = _writer(tmp_path, detector='blob')
+    writer.write_chunk(full_run[0][:5], full_run[0][4]['frame'] + 1)
+    with pytest.raises(ValueError, match='detector'):
+        _writer(tmp_path, resume=True, detector='contour')
+    assert (tmp_path / 'stream.json').exists()
+
+
+@pytest.mark.parametrize('total_rows, max_points, step', [(10, 100, 1), (1000, 100, 10), (1001, 100, 11)])
+def test_read_csv_downsampled_keeps_evenly_spaced_rows(tmp_path, total_rows, max_points, step):
+    csv_path = tmp_path / 'long.csv'
+    pd.DataFrame({'time': range(total_rows), 'x': range(total_rows), 'extra': 0}).to_csv(csv_path, index=False)
+    df, used_step = read_csv_downsampled(str(csv_path), ['time', 'x'], total_rows,
+                                         max_points=max_points, chunk_rows=37)
+    assert used_step == step
+    assert list(df.columns) == ['time', 'x']
+    assert len(df) <= max_points
+    assert df['time'].tolist() == list(range(0, total_rows, step))